@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Offline micro-benchmarks for listing parsing, title normalization,
+matching and ROM search
+
+Synthetic Myrient (table) and Archive.org (anchor) listings with
+No-Intro and Redump style names are generated at each size, so nothing
+touches the network or needs a display. Each run is appended to a JSON
+lines history and compared with the previous run; metrics that got
+slower or heavier than the threshold are flagged as regressions.
+
+Examples:
+    python benchmarks/hot_paths.py
+    python benchmarks/hot_paths.py --sizes 1000,10000 --repeat 5
+    python benchmarks/hot_paths.py --fail-on-regression --threshold 0.15
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from urllib.parse import quote
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.listing_parser import parse_listing
+from core.rom_store import ROMStore
+from core.search_index import TrigramIndex, filter_roms
+from core.title_resolver import TitleResolver, search_entries
+from utils.text_utils import clean_filename, clean_title, normalize_title
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_HISTORY = os.path.join(PROJECT_ROOT, "benchmarks", "results", "history.jsonl")
+MYRIENT_URL = "https://myrient.erista.me/files/No-Intro/Nintendo%20-%20Game%20Boy%20Advance/"
+ARCHIVE_URL = "https://archive.org/download/nointro.gba"
+
+WORDS = (
+    "Super Mega Dragon Quest Legend Star Wars Racing Puzzle Fighter Kingdom Tales Soccer Pro "
+    "Adventure Island Castle Ninja Space Dream World Final Fantasy Mario Kirby Sonic Zelda Metal "
+    "Knight Shadow Ultimate Battle Monster Party Golf Tennis Street Crystal Ocean Thunder Hero "
+    "Little Rocket Magic Warrior Dungeon Pinball Hockey Turbo Galaxy Saga Chronicles Journey"
+).split()
+REGIONS = ("USA", "Europe", "Japan", "World", "USA, Europe", "Japan, USA", "France", "Germany", "Korea")
+LANGUAGES = ("En", "En,Fr,De", "En,Fr,De,Es,It", "Ja", "En,Ja")
+TAGS = ("Rev 1", "Rev 2", "Beta", "Proto", "Demo", "Virtual Console", "Alt")
+SEARCH_QUERIES = ("dragon", "mario kart", r"\(Rev \d\)", r"^Super.*\(Japan\)", r"[0-9]+")
+
+
+def make_names(count, seed=1):
+    """Generate unique No-Intro and Redump style file names"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.3:
+            title += f" {rng.randint(2, 9)}"
+        if rng.random() < 0.2:
+            title += f" - {rng.choice(WORDS)} {rng.choice(WORDS)}"
+        parts = [title, f"({rng.choice(REGIONS)})"]
+        if rng.random() < 0.4:
+            parts.append(f"({rng.choice(LANGUAGES)})")
+        if rng.random() < 0.25:
+            parts.append(f"({rng.choice(TAGS)})")
+        if rng.random() < 0.15:
+            # Redump multi-disc images
+            parts.append(f"(Disc {rng.randint(1, 4)})")
+            extension = rng.choice((".zip", ".chd", ".7z"))
+        else:
+            extension = ".zip"
+        names.add(" ".join(parts) + extension)
+    return sorted(names)
+
+
+def make_myrient_html(names):
+    """Build a Myrient style listing table"""
+    rows = ['<tr><td class="link"><a href="../" title="Parent directory">Parent directory/</a></td>'
+            '<td class="size">-</td><td class="date">-</td></tr>']
+    for name in names:
+        rows.append(
+            f'<tr><td class="link"><a href="{quote(name)}" title="{name}">{name}</a></td>'
+            f'<td class="size">12.4 MiB</td><td class="date">24-Mar-2024 13:37</td></tr>'
+        )
+    return (
+        '<html><head><title>Index of /files/</title></head><body><h1>Index of /files/</h1>'
+        '<table id="list"><thead><tr><th>File Name</th><th>File Size</th><th>Date</th></tr></thead>'
+        '<tbody>' + ''.join(rows) + '</tbody></table></body></html>'
+    )
+
+
+def make_archive_html(names):
+    """Build an Archive.org style download listing"""
+    links = ['<a href="../">Go to parent directory</a>']
+    for name in names:
+        links.append(
+            f'<tr><td><a href="{quote(name)}">{name}</a></td>'
+            f'<td>24-Mar-2024 13:37</td><td>12.4M</td></tr>'
+        )
+    return '<html><body><table class="directory-listing-table">' + ''.join(links) + '</table></body></html>'
+
+
+def measure(func, repeat):
+    """Return the best wall time of several calls and the peak traced memory of one"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+
+    # Tracing slows everything down, so memory is measured in a separate call
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_size(size, repeat):
+    """Run every benchmark against listings with `size` entries"""
+    names = make_names(size)
+    myrient_html = make_myrient_html(names)
+    archive_html = make_archive_html(names)
+    myrient_entries = parse_listing(myrient_html, MYRIENT_URL)
+    archive_entries = parse_listing(archive_html, ARCHIVE_URL)
+    listings = [(MYRIENT_URL, myrient_entries), (ARCHIVE_URL, archive_entries)]
+    roms = ROMStore.from_listings(listings)
+    index = TrigramIndex(roms)
+
+    rng = random.Random(size)
+    hits = [clean_title(name) for name in rng.sample(names, min(500, size))]
+    # Misses fall back to a substring scan, so a few go a long way
+    misses = [f"Missing Title {i} (USA)" for i in range(20)]
+    queries = hits + misses
+    stream_queries = hits[:3] + misses[:2]
+    resolver = TitleResolver([(MYRIENT_URL, myrient_entries), (ARCHIVE_URL, archive_entries)])
+
+    def search_all(use_index):
+        for query in SEARCH_QUERIES:
+            filter_roms(roms, query, index=index if use_index else None)
+
+    benchmarks = {
+        'parse_myrient': (lambda: parse_listing(myrient_html, MYRIENT_URL), size),
+        'parse_archive': (lambda: parse_listing(archive_html, ARCHIVE_URL), size),
+        'clean_title': (lambda: [clean_title(name) for name in names], size),
+        'normalize_title': (lambda: [normalize_title(clean_title(name)) for name in names], size),
+        'clean_filename': (lambda: [clean_filename(name) for name in names], size),
+        'resolver_build': (lambda: TitleResolver([(MYRIENT_URL, myrient_entries),
+                                                  (ARCHIVE_URL, archive_entries)]), 2 * size),
+        'resolver_match': (lambda: [resolver.resolve(query) for query in queries], len(queries)),
+        'stream_match': (lambda: [search_entries(query, MYRIENT_URL, myrient_entries)
+                                  for query in stream_queries], len(stream_queries)),
+        'store_build': (lambda: ROMStore.from_listings(listings), 2 * size),
+        'index_build': (lambda: TrigramIndex(roms), len(roms)),
+        'search_scan': (lambda: search_all(False), len(SEARCH_QUERIES)),
+        'search_indexed': (lambda: search_all(True), len(SEARCH_QUERIES))
+    }
+
+    results = {}
+    for name, (func, items) in benchmarks.items():
+        seconds, peak = measure(func, repeat)
+        results[f"{name}[{size}]"] = {
+            'seconds': seconds,
+            'per_second': items / seconds if seconds else None,
+            'peak_kb': peak / 1024
+        }
+    return results
+
+
+def load_history(path):
+    """Load previous runs from a JSON lines history file"""
+    runs = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    runs.append(json.loads(line))
+    except (OSError, ValueError):
+        pass
+    return runs
+
+
+def append_history(path, run):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run) + "\n")
+
+
+def compare(current, baseline, threshold, min_seconds=0.005):
+    """
+    List metrics that are slower or use more memory than the baseline by more than the threshold
+
+    Timings under `min_seconds` in both runs are too noisy to compare.
+    """
+    regressions = []
+    for name, result in current.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ('seconds', 'peak_kb'):
+            before, after = previous.get(key), result.get(key)
+            if key == 'seconds' and max(before or 0, after or 0) < min_seconds:
+                continue
+            if before and after and after > before * (1 + threshold):
+                regressions.append({'metric': name, 'field': key, 'before': before, 'after': after,
+                                    'change': after / before - 1})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing parsing, matching and search offline")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma separated listing sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per benchmark (best is kept)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON lines file runs are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Don't append this run to the history")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+                        help="Ignore timing changes when both runs are faster than this")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--json", action="store_true", help="Print the run as JSON")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = {}
+    for size in sizes:
+        results.update(run_size(size, max(1, args.repeat)))
+
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': sizes,
+        'results': results
+    }
+
+    history = load_history(args.history)
+    baseline = history[-1]['results'] if history else {}
+    regressions = compare(results, baseline, args.threshold, args.min_seconds)
+    run['regressions'] = regressions
+
+    if not args.no_save:
+        append_history(args.history, run)
+
+    if args.json:
+        print(json.dumps(run, indent=2))
+    else:
+        print(f"{'benchmark':<28} {'time':>10} {'items/s':>14} {'peak':>12}")
+        for name, result in results.items():
+            rate = f"{result['per_second']:,.0f}" if result['per_second'] else "-"
+            print(f"{name:<28} {result['seconds'] * 1000:8.2f}ms {rate:>14} {result['peak_kb']:10.0f}KB")
+        if baseline:
+            print()
+            if regressions:
+                for item in regressions:
+                    print(f"REGRESSION {item['metric']} {item['field']}: "
+                          f"{item['before']:.4g} -> {item['after']:.4g} (+{item['change']:.0%})")
+            else:
+                print(f"No regressions over {args.threshold:.0%} against {history[-1]['timestamp']}")
+
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
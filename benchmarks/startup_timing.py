@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Startup timing harness
+
+Launches the GUI repeatedly with RA_STARTUP_TIMING=exit and reports
+import time, time-to-first-paint and total process time. With
+--importtime it also lists the slowest modules imported at startup.
+
+Examples:
+    python benchmarks/startup_timing.py --runs 5 --offscreen
+    python benchmarks/startup_timing.py --command dist/main.exe  (console build)
+    python benchmarks/startup_timing.py --importtime
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMING_PATTERN = re.compile(r"startup_timing imports_ms=([\d.]+) first_paint_ms=([\d.]+)")
+
+
+def run_once(command, env, timeout):
+    """Launch the app once and return its timings in milliseconds"""
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env, cwd=PROJECT_ROOT, capture_output=True,
+                            text=True, timeout=timeout)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    match = TIMING_PATTERN.search(result.stderr)
+    if not match:
+        raise RuntimeError(f"No timing output (exit code {result.returncode}):\n{result.stderr}")
+    return {
+        'imports_ms': float(match.group(1)),
+        'first_paint_ms': float(match.group(2)),
+        'process_ms': wall_ms
+    }
+
+
+def summarize(runs):
+    """Reduce a list of run timings to median and min per metric"""
+    summary = {}
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        summary[key] = {'median': statistics.median(values), 'min': min(values)}
+    return summary
+
+
+def import_breakdown(top):
+    """Return the slowest cumulative imports of the GUI module graph"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure application startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of launches to time")
+    parser.add_argument("--command", default=None, help="Executable to time instead of main.py (e.g. the PyInstaller build)")
+    parser.add_argument("--offscreen", action="store_true", help="Use Qt's offscreen platform (no display needed)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before a launch is considered hung")
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports")
+    parser.add_argument("--top", type=int, default=15, help="Rows to show with --importtime")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.importtime:
+        for cumulative_us, module in import_breakdown(args.top):
+            print(f"{cumulative_us / 1000:9.1f} ms  {module}")
+        return 0
+
+    command = [args.command] if args.command else [sys.executable, os.path.join(PROJECT_ROOT, "main.py")]
+    env = dict(os.environ, RA_STARTUP_TIMING="exit")
+    if args.offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+
+    runs = [run_once(command, env, args.timeout) for _ in range(args.runs)]
+    summary = summarize(runs)
+
+    if args.json:
+        print(json.dumps({'runs': runs, 'summary': summary}, indent=2))
+    else:
+        for key, stats in summary.items():
+            print(f"{key:<16} median {stats['median']:8.1f} ms   min {stats['min']:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
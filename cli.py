@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+RetroAchievements ROM Collector
+Headless command-line entry point for unattended collection runs
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Exit status codes
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+EXIT_INTERRUPTED = 130
+
+
+class ProgressPrinter:
+    """Prints collector progress as plain text or JSON lines"""
+
+    def __init__(self, as_json=False, stream=sys.stdout):
+        self.as_json = as_json
+        self.stream = stream
+        self.last_percent = {}
+
+    def write(self, event, **fields):
+        if self.as_json:
+            fields = dict(event=event, time=round(time.time(), 3), **fields)
+            line = json.dumps(fields, ensure_ascii=False)
+        elif event == 'download':
+            line = f"  {fields['file']}: {fields['percent']}%"
+        elif event == 'percent':
+            line = f"[{fields['value']:3d}%]"
+        else:
+            line = fields.get('message', '')
+        self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def progress_update(self, message):
+        self.write('status', message=message)
+
+    def progress_percent(self, value):
+        self.write('percent', value=value)
+
+    def download_progress(self, filename, current, total):
+        # Only report whole-percent steps so large files don't flood the log
+        percent = int(current * 100 / total) if total else 0
+        if self.last_percent.get(filename) == percent:
+            return
+        self.last_percent[filename] = percent
+        self.write('download', file=filename, current=current, total=total, percent=percent)
+
+
+def parse_consoles(value, supported):
+    """Parse a comma separated console list, rejecting unknown names"""
+    consoles = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in consoles if name not in supported]
+    if unknown:
+        raise ValueError(f"Unsupported console(s): {', '.join(unknown)}")
+    return consoles
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Collect ROMs for the most recent RetroAchievements sets without the GUI"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    collect = subparsers.add_parser("collect", help="Download ROMs for recent achievement set claims")
+    collect.add_argument("--count", type=int, default=None, help="Number of recent claims to process")
+    collect.add_argument("--consoles", default="", help='Comma separated console filter, e.g. "PlayStation,Saturn"')
+    collect.add_argument("--download-path", default=None, help="Download directory (defaults to DIRECTORY_PATH)")
+    collect.add_argument("--api-key", default=None, help="RetroAchievements API key (defaults to API_KEY)")
+    collect.add_argument("--json", action="store_true", help="Print progress as JSON lines")
+    collect.add_argument("--metrics", action="store_true",
+                         help="Export a trace and Prometheus metrics for the run (also METRICS_ENABLED=1)")
+    collect.add_argument("--profile", choices=("cpu", "sample"), default=None,
+                         help="Profile the run with cProfile or a stack sampler, plus tracemalloc (also PROFILING=...)")
+
+    subparsers.add_parser("consoles", help="List supported consoles")
+    return parser
+
+
+def run_collect(args):
+    from core.config import config
+    from core.rom_sources import get_supported_consoles
+
+    printer = ProgressPrinter(as_json=args.json)
+
+    try:
+        consoles = parse_consoles(args.consoles, get_supported_consoles())
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return EXIT_USAGE
+
+    count = args.count if args.count is not None else config.default_rom_count
+    if not 1 <= count <= config.max_rom_count:
+        sys.stderr.write(f"--count must be between 1 and {config.max_rom_count}\n")
+        return EXIT_USAGE
+
+    api_key = args.api_key or config.get_api_key()
+    download_path = args.download_path or config.get_download_path()
+    if not api_key or not download_path:
+        sys.stderr.write("An API key and download path are required (see --api-key, --download-path or .env)\n")
+        return EXIT_USAGE
+
+    if args.metrics:
+        config.metrics_enabled = True
+
+    from utils.profiling import profiler
+    try:
+        profiler.configure(
+            args.profile or config.profiling_mode, config.get_profiles_dir(),
+            config.profiling_sample_interval, config.profiling_memory, config.profiling_top_allocations
+        )
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return EXIT_USAGE
+
+    from core.collector import ROMCollector
+
+    collector = ROMCollector(
+        count,
+        download_path,
+        api_key,
+        consoles,
+        progress_update=printer.progress_update,
+        progress_percent=printer.progress_percent,
+        download_progress=printer.download_progress
+    )
+
+    from utils.cancellation import Cancelled
+
+    def stop_on_interrupt(signum, frame):
+        # The first Ctrl+C stops cleanly, keeping partial files; a second one aborts
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        collector.stop()
+
+    previous_handler = signal.signal(signal.SIGINT, stop_on_interrupt)
+    try:
+        result = collector.run()
+    except (Cancelled, KeyboardInterrupt):
+        printer.write('error', message="Interrupted")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        printer.write('error', message=f"❌ Error: {e}")
+        return EXIT_ERROR
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+
+    printer.write('finished', **result)
+    if result['downloaded'] < result['requested']:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+
+def main(argv=None):
+    """Main entry point for the command line"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "collect":
+        return run_collect(args)
+    if args.command == "consoles":
+        from core.rom_sources import get_supported_consoles
+        for console in get_supported_consoles():
+            print(console)
+        return EXIT_OK
+
+    parser.print_help()
+    return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -2,55 +2,231 @@
 RetroAchievements API client
 """
 
+import json
+import os
 import requests
+import threading
 import time
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Union
 from .config import config
+from .http_transport import http_session
+from .rate_limiter import TokenBucket, parse_retry_after
+from utils.metrics import metrics
+
+# Shared by every client so concurrent fetches respect one request rate
+rate_limiter = TokenBucket(1 / config.request_delay, config.api_burst)
+
+
+class ResponseCache:
+    """Persistent TTL cache of API responses keyed by endpoint and game ID"""
+    
+    def __init__(self, path: str, ttls: Dict[str, float], max_entries: int, save_interval: float = 1.0):
+        self.path = path
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes flushes, which share a temp file
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+    
+    @staticmethod
+    def make_key(endpoint: str, game_id) -> str:
+        """Build the cache key for an endpoint and game ID"""
+        return f"{endpoint}:{game_id}"
+    
+    def get_ttl(self, endpoint: str) -> float:
+        """Get the TTL for an endpoint, 0 if it isn't cached"""
+        return self.ttls.get(endpoint, 0)
+    
+    def get(self, endpoint: str, game_id):
+        """Get a cached response if it hasn't expired"""
+        ttl = self.get_ttl(endpoint)
+        if ttl <= 0:
+            return None
+        
+        key = self.make_key(endpoint, game_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['stored_at'] >= ttl:
+                del self._entries[key]
+                self._dirty = True
+                return None
+            self._entries.move_to_end(key)
+            return entry['data']
+    
+    def put(self, endpoint: str, game_id, data) -> None:
+        """Store a response, evicting the least recently used entries"""
+        if self.get_ttl(endpoint) <= 0:
+            return
+        
+        key = self.make_key(endpoint, game_id)
+        with self._lock:
+            self._entries[key] = {'stored_at': time.time(), 'data': data}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write pending changes to disk"""
+        # Snapshot under the write lock too, so an older cache never replaces a newer one
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = list(self._entries.items())
+                self._dirty = False
+                self._last_save = time.monotonic()
+            
+            tmp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, separators=(',', ':'))
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # Losing the cache only costs extra requests next run
+    
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+        self.flush()
+    
+    def _load(self) -> None:
+        """Load cached responses from disk"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = OrderedDict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            self._entries = OrderedDict()
+
+
+# Global response cache instance
+response_cache = ResponseCache(
+    os.path.join(config.cache_dir, 'api_responses.json'),
+    config.api_cache_ttls,
+    config.api_cache_max_entries
+)
 
 
 class RetroAchievementsAPI:
     """Client for RetroAchievements API"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, use_cache: bool = True, cancel_token=None):
         self.api_key = api_key
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'RetroAchievements-ROM-Collector/1.0'
-        })
+        self.use_cache = use_cache
+        self.session = http_session
+        self.cancel_token = cancel_token
+    
+    def _get_json(self, url: str):
+        """Make a rate-limited GET request, backing off on 429 responses"""
+        for attempt in range(config.api_max_retries + 1):
+            if self.cancel_token is not None:
+                self.cancel_token.raise_if_cancelled()
+            rate_limiter.acquire(cancel=self.cancel_token)
+            response = self.session.get(url)
+            if response.status_code == 429 and attempt < config.api_max_retries:
+                delay = parse_retry_after(response.headers.get('Retry-After'))
+                if delay is None:
+                    delay = config.request_delay * (2 ** (attempt + 1))
+                metrics.count('api_rate_limited_total')
+                rate_limiter.pause(delay)
+                continue
+            response.raise_for_status()
+            return response.json()
+    
+    def _get_cached(self, endpoint: str, game_id: int, url: str, use_cache: Optional[bool]):
+        """Serve a per-game endpoint from the response cache when allowed"""
+        if use_cache is None:
+            use_cache = self.use_cache
+        
+        if use_cache:
+            data = response_cache.get(endpoint, game_id)
+            if data is not None:
+                metrics.count('api_cache_requests_total', endpoint=endpoint, result='hit')
+                return data
+            metrics.count('api_cache_requests_total', endpoint=endpoint, result='miss')
+        
+        data = self._get_json(url)
+        response_cache.put(endpoint, game_id, data)
+        return data
     
     def get_recent_claims(self) -> List[Dict]:
         """Get recent achievement claims"""
         url = config.get_api_url(f"API_GetClaims.php?k=1&y={self.api_key}")
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
+            return self._get_cached('API_GetClaims', 'recent', url, self.use_cache)
         except requests.RequestException as e:
             raise Exception(f"Failed to fetch claims: {e}")
     
-    def get_game_hashes(self, game_id: int) -> Dict:
+    def get_game_hashes(self, game_id: int, use_cache: Optional[bool] = None) -> Dict:
         """Get game hashes for a specific game ID"""
         url = config.get_api_url(f"API_GetGameHashes.php?i={game_id}&y={self.api_key}")
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
+            return self._get_cached('API_GetGameHashes', game_id, url, use_cache)
         except requests.RequestException as e:
             raise Exception(f"Failed to fetch game hashes for game {game_id}: {e}")
     
-    def get_game_info(self, game_id: int) -> Dict:
+    def get_game_info(self, game_id: int, use_cache: Optional[bool] = None) -> Dict:
         """Get detailed game information"""
         url = config.get_api_url(f"API_GetGame.php?i={game_id}&y={self.api_key}")
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
+            return self._get_cached('API_GetGame', game_id, url, use_cache)
         except requests.RequestException as e:
             raise Exception(f"Failed to fetch game info for game {game_id}: {e}")
     
+    def get_game_hashes_batch(self, game_ids: Iterable[int], max_workers: Optional[int] = None,
+                              use_cache: Optional[bool] = None) -> Dict[int, Union[Dict, Exception]]:
+        """Get game hashes for several games concurrently"""
+        return self._fetch_many(self.get_game_hashes, game_ids, max_workers, use_cache)
+    
+    def get_game_info_batch(self, game_ids: Iterable[int], max_workers: Optional[int] = None,
+                            use_cache: Optional[bool] = None) -> Dict[int, Union[Dict, Exception]]:
+        """Get game information for several games concurrently"""
+        return self._fetch_many(self.get_game_info, game_ids, max_workers, use_cache)
+    
+    def _fetch_many(self, fetch: Callable[..., Dict], game_ids: Iterable[int],
+                    max_workers: Optional[int], use_cache: Optional[bool]) -> Dict[int, Union[Dict, Exception]]:
+        """
+        Run a per-game fetch for many games under the shared rate limit
+        
+        Returns:
+            Dict mapping each game ID to its result, or the exception it raised
+        """
+        unique_ids = list(dict.fromkeys(game_ids))
+        results: Dict[int, Union[Dict, Exception]] = {}
+        if not unique_ids:
+            return results
+        
+        def fetch_one(game_id):
+            try:
+                return fetch(game_id, use_cache)
+            except Exception as e:
+                return e
+        
+        workers = min(max_workers or config.api_max_workers, len(unique_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for game_id, result in zip(unique_ids, executor.map(fetch_one, unique_ids)):
+                results[game_id] = result
+        response_cache.flush()
+        return results
+    
     def rate_limit_delay(self):
         """Apply rate limiting delay"""
-        time.sleep(config.request_delay)
\ No newline at end of file
+        time.sleep(config.request_delay)
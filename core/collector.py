@@ -0,0 +1,552 @@
+"""
+ROM collection pipeline, independent of the GUI
+"""
+
+import os
+import re
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from .api_client import RetroAchievementsAPI
+from .config import config
+from .download_scheduler import DownloadScheduler
+from .http_transport import http_session, prewarm
+from .library_manifest import LibraryManifest
+from .mirror_health import mirror_health
+from .listing_cache import listing_cache
+from .rom_sources import ROM_SOURCES
+from .title_resolver import TitleResolver, search_entries
+from .verification import (
+    VERIFIED, MISMATCHED, UNVERIFIABLE, create_hasher, get_digests, get_expected_md5s, verify
+)
+from utils.archive_utils import can_extract, process_archive
+from utils.cancellation import CancellationToken, Cancelled
+from utils.file_utils import get_part_path
+from utils.metrics import metrics
+from utils.profiling import profiler
+from utils.progress import ProgressThrottle
+from utils.segmented_download import download_with_mirrors
+from utils.text_utils import clean_title
+
+
+# Download outcomes passed to the download_finished callback
+DOWNLOADED = 'downloaded'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+STOPPED = 'stopped'
+
+
+def _ignore(*args):
+    pass
+
+
+class ROMCollector:
+    """Fetches recent claims and downloads matching ROMs, reporting through callbacks"""
+
+    def __init__(self, num_roms, download_path, api_key, selected_consoles=None,
+                 progress_update: Optional[Callable[[str], None]] = None,
+                 progress_percent: Optional[Callable[[int], None]] = None,
+                 download_progress: Optional[Callable[[str, int, int], None]] = None,
+                 cancel_token: Optional[CancellationToken] = None,
+                 download_finished: Optional[Callable[[str, str], None]] = None):
+        """
+        Args:
+            progress_update: Receives human readable status messages
+            progress_percent: Receives overall progress from 0 to 100
+            download_progress: Receives (filename, current, total) byte progress
+            download_finished: Receives (filename, status) once a download ends,
+                with DOWNLOADED, SKIPPED, FAILED or STOPPED
+            cancel_token: Stops the run when cancelled, see stop()
+        """
+        self.num_roms = num_roms
+        self.download_path = download_path
+        self.api_key = api_key
+        self.selected_consoles = selected_consoles or []
+        self.cancel = cancel_token or CancellationToken()
+        self.api_client = RetroAchievementsAPI(api_key, cancel_token=self.cancel)
+        self.progress_update = progress_update or _ignore
+        self.progress_percent = progress_percent or _ignore
+        self.download_progress = download_progress or _ignore
+        self.download_finished = download_finished or _ignore
+        # Chunk-level byte counts are coalesced before reaching download_progress
+        self.progress_throttle = ProgressThrottle(self.download_progress, config.progress_update_hz)
+        # (console, title) -> MD5s RetroAchievements accepts for that game
+        self.expected_hashes = {}
+        # filename -> verification status and digests of each finished download
+        self.verification = {}
+        self.manifest = LibraryManifest(download_path)
+        # Archives are tested and extracted in other processes while downloads continue
+        self.archive_pool = None
+        self.archive_futures = []
+
+    def run(self) -> Dict:
+        """
+        Run the full collection pipeline
+
+        With metrics enabled, each stage and HTTP request is timed and the
+        run's trace and metrics are exported when it ends. With profiling
+        on, the whole run is profiled.
+
+        Returns:
+            Dict with 'requested', 'matched', 'downloaded', 'owned' and 'message' keys
+
+        Raises:
+            Cancelled: stop() was called; partial downloads are kept for a resume
+        """
+        metrics.start(config.metrics_enabled)
+        try:
+            with profiler.section('collector', self.report_profile):
+                with metrics.span('collect.run', num_roms=self.num_roms):
+                    return self.collect()
+        finally:
+            if metrics.enabled:
+                self.export_metrics()
+
+    def stop(self):
+        """
+        Ask a running collection to stop, from any thread
+
+        Open transfers are aborted, queued downloads and extractions are
+        dropped and run() raises Cancelled once its workers have returned.
+        """
+        self.cancel.cancel()
+
+    def collect(self) -> Dict:
+        """Run each pipeline stage in turn"""
+        if config.http_prewarm:
+            prewarm()
+
+        # Pick up files added, changed or removed since the last run
+        with metrics.span('collect.reconcile'):
+            changes = self.manifest.reconcile()
+        if any(changes.values()):
+            self.progress_update(
+                f"📚 Library updated: {changes['added']} added, "
+                f"{changes['changed']} changed, {changes['removed']} removed"
+            )
+
+        # Step 1: Make API request
+        self.progress_update("🔄 Fetching recent claims from RetroAchievements...")
+        self.progress_percent(10)
+
+        with metrics.span('collect.claims'):
+            game_data = self.api_client.get_recent_claims()
+        self.cancel.raise_if_cancelled()
+
+        # Step 2: Get top N recent games
+        self.progress_update(f"📋 Processing {self.num_roms} most recent claims...")
+        self.progress_percent(20)
+
+        sorted_data = sorted(game_data, key=lambda entry: entry.get("DoneTime", ""), reverse=True)
+        most_recent = sorted_data[:self.num_roms]
+
+        # Step 3: Process game data
+        self.progress_update("🎮 Processing game information...")
+        self.progress_percent(30)
+
+        game_dict = {'games': [], 'consoles': []}
+        # Games skipped by ID never reach game_dict, unlike titles found on disk later
+        owned_by_id = 0
+
+        for game in most_recent:
+            game_id = game['GameID']
+            console_name = game['ConsoleName']
+
+            # Filter by selected consoles if specified
+            if self.selected_consoles and console_name not in self.selected_consoles:
+                continue
+
+            # Games already in the library need no further requests
+            entry = self.manifest.find(console_name, game_id=game_id)
+            if entry:
+                self.progress_update(f"⚠️ Skipped (already in library): {entry['filename']}")
+                owned_by_id += 1
+                continue
+
+            game_dict['games'].append(game_id)
+            game_dict['consoles'].append(console_name)
+
+        # Step 4: Get ROM titles
+        self.progress_update("🔍 Retrieving Game titles...")
+        self.progress_percent(50)
+
+        with metrics.span('collect.hash_lookup', games=len(game_dict['games'])):
+            game_title_list = self.get_titles(game_dict['games'], game_dict['consoles'])
+        self.cancel.raise_if_cancelled()
+        with metrics.span('collect.owned_check'):
+            owned_on_disk = self.skip_owned_titles(game_dict['games'], game_title_list, game_dict['consoles'])
+        owned_count = owned_by_id + owned_on_disk
+
+        # Step 5: Resolve titles against each console's listings
+        self.progress_update("🔎 Matching Game titles against sources...")
+        self.progress_percent(60)
+
+        with metrics.span('collect.match') as span:
+            jobs = self.resolve_titles(game_title_list, game_dict['consoles'], game_dict['games'])
+            span.set(jobs=len(jobs))
+        self.cancel.raise_if_cancelled()
+
+        # Step 6: Download ROMs
+        self.progress_update("⬇️ Starting Game downloads...")
+        self.progress_percent(70)
+
+        scheduler = DownloadScheduler(
+            self.download_job,
+            config.max_concurrent_downloads,
+            config.per_host_download_limits,
+            config.default_host_download_limit,
+            on_progress=self.progress_throttle.update,
+            on_complete=lambda done, total: self.progress_percent(70 + int((done / total) * 25)),
+            cancel=self.cancel
+        )
+        if config.post_process_archives:
+            self.archive_pool = ProcessPoolExecutor(max_workers=config.archive_workers)
+        try:
+            with metrics.span('collect.transfer', jobs=len(jobs)):
+                results = scheduler.run(jobs)
+            self.progress_throttle.flush()
+            self.cancel.raise_if_cancelled()
+            with metrics.span('collect.archives'):
+                self.wait_for_archives()
+        finally:
+            if self.archive_pool is not None:
+                # A stopped run drops queued extractions instead of waiting for them
+                self.archive_pool.shutdown(wait=not self.cancel.is_cancelled(), cancel_futures=True)
+                self.archive_pool = None
+            # Keep what finished before a stop
+            self.manifest.flush()
+            mirror_health.flush()
+        downloaded_count = sum(1 for success in results if success)
+        metrics.count('games_total', owned_count, result='owned')
+        metrics.count('games_total', downloaded_count, result='downloaded')
+        metrics.count('games_total', len(jobs) - downloaded_count, result='failed')
+
+        verification_counts = {
+            status: sum(1 for record in self.verification.values() if record['status'] == status)
+            for status in (VERIFIED, MISMATCHED, UNVERIFIABLE)
+        }
+        if self.verification:
+            self.progress_update(
+                f"🔐 Verification: {verification_counts[VERIFIED]} verified, "
+                f"{verification_counts[MISMATCHED]} mismatched, "
+                f"{verification_counts[UNVERIFIABLE]} unverifiable"
+            )
+
+        self.progress_percent(100)
+        return {
+            'requested': len(game_dict['games']) + owned_by_id,
+            'matched': len(jobs),
+            'downloaded': downloaded_count + owned_count,
+            'owned': owned_count,
+            'verification': verification_counts,
+            'message': f"✅ Process completed! Downloaded {downloaded_count} Games"
+        }
+
+    def get_titles(self, game_ids, consoles) -> List[str]:
+        """Get the ROM base name for each game from its RetroAchievements hashes"""
+        hashes_by_game = self.api_client.get_game_hashes_batch(game_ids)
+
+        game_title_list = []
+        for game_id, console in zip(game_ids, consoles):
+            try:
+                data = hashes_by_game[game_id]
+                if isinstance(data, Exception):
+                    raise data
+
+                results = data.get('Results', [])
+                if not results:
+                    game_title_list.append('Unknown')
+                    continue
+
+                clean_results = [res for res in results if not res.get('PatchUrl')]
+                if len(clean_results) == 0:
+                    selected_result = results[0]
+                else:
+                    selected_result = clean_results[0]
+
+                raw_name = selected_result.get('Name', 'Unknown Title')
+
+                if console == "Arcade":
+                    filename = raw_name.split()[0]
+                    rom_base_name = re.sub(r'\.[a-z0-9]+$', '', filename, flags=re.IGNORECASE)
+                else:
+                    rom_base_name = clean_title(raw_name)
+
+                game_title_list.append(rom_base_name.strip())
+                self.expected_hashes[(console, rom_base_name.strip())] = get_expected_md5s(results)
+                self.progress_update(f"📝 Found: {rom_base_name.strip()} ({console})")
+
+            except Exception as e:
+                self.progress_update(f"❌ Error processing game: {e}")
+                game_title_list.append('Error')
+
+        return game_title_list
+
+    def skip_owned_titles(self, game_ids, titles, consoles):
+        """
+        Mark titles already in the library, by name or RetroAchievements hash
+
+        Owned titles are replaced with 'Owned' so they aren't resolved or
+        downloaded, and their game ID is recorded for the next run.
+        """
+        owned_count = 0
+        for i, (game_id, title, console) in enumerate(zip(game_ids, titles, consoles)):
+            if title in ['Unknown', 'Error']:
+                continue
+            entry = self.manifest.find(console, title=title, md5s=self.expected_hashes.get((console, title)))
+            if entry is None:
+                continue
+            self.manifest.record(console, entry['filename'], game_id=game_id, title=title)
+            self.progress_update(f"⚠️ Skipped (already in library): {entry['filename']}")
+            titles[i] = 'Owned'
+            owned_count += 1
+        return owned_count
+
+    def resolve_titles(self, titles, consoles, game_ids=None):
+        """
+        Resolve all titles to download jobs, loading each console's listings once
+
+        A console with a single title streams its listings instead and
+        stops reading at the match.
+        """
+        titles_by_console = {}
+        for i, (title, console) in enumerate(zip(titles, consoles)):
+            if title in ['Unknown', 'Error', 'Owned']:
+                continue
+            game_id = game_ids[i] if game_ids else None
+            titles_by_console.setdefault(console, []).append((title, game_id))
+
+        jobs = []
+        seen = set()
+        for console, console_titles in titles_by_console.items():
+            if not self.get_source_urls(console):
+                self.progress_update(f"⚠️ No Game source for console: {console}")
+                continue
+            if len(console_titles) == 1:
+                # Stops reading at the match instead of loading every listing in full
+                resolve = partial(self.find_title, console=console)
+            else:
+                resolve = self.load_resolver(console).resolve
+
+            for title, game_id in console_titles:
+                match = resolve(title)
+                if match is None:
+                    self.progress_update(f"❌ No match found for {title}")
+                    continue
+
+                self.progress_update(f"✅ Located {title} on {match['host']}")
+                if (console, match['filename']) in seen:
+                    continue
+                seen.add((console, match['filename']))
+                jobs.append(dict(match, title=title, console=console, game_id=game_id,
+                                 md5s=self.expected_hashes.get((console, title))))
+
+        return jobs
+
+    def get_source_urls(self, console) -> List[str]:
+        """Get the listing URLs for a console, in order of preference"""
+        source_urls = ROM_SOURCES.get(console) or []
+        if isinstance(source_urls, str):
+            source_urls = [source_urls]
+        return source_urls
+
+    def load_resolver(self, console):
+        """Load every listing for a console into a title resolver"""
+        listings = []
+        for url in self.get_source_urls(console):
+            try:
+                self.progress_update(f"🔍 Loading listing {url}")
+                with metrics.span('collect.listing', url=url) as span:
+                    entries = listing_cache.fetch(url, cancel=self.cancel)
+                    span.set(entries=len(entries))
+                listings.append((url, entries))
+            except Cancelled:
+                raise
+            except Exception as e:
+                self.progress_update(f"❌ Error accessing {url}: {e}")
+
+        return TitleResolver(listings)
+
+    def find_title(self, title, console):
+        """
+        Find a single title by streaming the console's listings
+
+        Each listing is read only until the title is found, so a console
+        with one claimed game doesn't pay for downloading whole pages.
+        An exact match in any source beats a substring match in an
+        earlier one, as in TitleResolver.
+        """
+        fallback = None
+        for url in self.get_source_urls(console):
+            try:
+                self.progress_update(f"🔍 Searching for {title} in {url}")
+                with metrics.span('collect.listing', url=url, streamed=True) as span:
+                    entries = listing_cache.iter_entries(url, cancel=self.cancel)
+                    try:
+                        match, exact = search_entries(title, url, entries)
+                    finally:
+                        entries.close()
+                    span.set(found=match is not None)
+            except Cancelled:
+                raise
+            except Exception as e:
+                self.progress_update(f"❌ Error accessing {url}: {e}")
+                continue
+
+            if exact:
+                return match
+            fallback = fallback or match
+        return fallback
+
+    def download_job(self, job, report):
+        """Download a resolved job from the scheduler and add it to the library"""
+        if self.cancel.is_cancelled():
+            return False
+        with metrics.span('collect.download', filename=job['filename'], host=job['host']) as span:
+            success = self.download_rom(job['url'], job['filename'], job['console'], report,
+                                        job.get('mirrors'), job.get('md5s'))
+            span.set(success=success)
+        if success:
+            record = dict(self.verification.get(job['filename'], {}))
+            status = record.pop('status', None)
+            self.manifest.record(job['console'], job['filename'], game_id=job.get('game_id'),
+                                 title=job.get('title'), source_url=job['url'],
+                                 digests=record, status=status)
+            # Only files fetched in this run have a verification record
+            if job['filename'] in self.verification:
+                self.queue_archive(job)
+        return success
+
+    def queue_archive(self, job):
+        """Hand a downloaded archive to the extraction pool"""
+        console_dir = os.path.join(self.download_path, "Games", job['console'])
+        filepath = os.path.join(console_dir, job['filename'])
+        if self.archive_pool is None or not can_extract(filepath):
+            return
+
+        self.progress_update(f"📦 Queued for extraction: {job['filename']}")
+        future = self.archive_pool.submit(
+            process_archive, filepath, console_dir, config.delete_archives_after_extract
+        )
+        future.add_done_callback(lambda done: self.on_archive_processed(job, done))
+        self.archive_futures.append(future)
+
+    def on_archive_processed(self, job, future):
+        """Report an extraction result and add the extracted files to the library"""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.progress_update(f"❌ Extraction failed: {job['filename']}: {e}")
+            return
+
+        if result['status'] == 'failed':
+            self.progress_update(f"❌ Archive test failed: {job['filename']}: {result['error']}")
+            return
+
+        self.progress_update(
+            f"📦 Extracted {job['filename']}: {len(result['files'])} file(s) in {result['seconds']:.1f}s"
+        )
+        if result['skipped']:
+            self.progress_update(
+                f"⚠️ Kept existing files instead of extracting over them: {', '.join(result['skipped'])}"
+            )
+        console_dir = os.path.join(self.download_path, "Games", job['console'])
+        for name in result['files']:
+            if os.path.isfile(os.path.join(console_dir, name)):
+                self.manifest.record(job['console'], name, game_id=job.get('game_id'),
+                                     title=job.get('title'), source_url=job['url'])
+
+    def report_profile(self, paths):
+        self.progress_update(f"🩺 Profile written to {os.path.dirname(paths[0])}")
+
+    def export_metrics(self):
+        """Write the run's trace and metrics and report a per-stage summary"""
+        self.progress_update("📊 Run metrics:")
+        for line in metrics.summary():
+            self.progress_update(line)
+        try:
+            paths = metrics.export(config.diagnostics_dir)
+            self.progress_update(f"📊 Trace written to {paths['trace']}")
+            self.progress_update(f"📊 Metrics written to {paths['prometheus']}")
+        except OSError as e:
+            self.progress_update(f"❌ Could not write metrics: {e}")
+
+    def wait_for_archives(self):
+        """Block until every queued archive has been processed, or the run is stopped"""
+        pending = [future for future in self.archive_futures if not future.done()]
+        if pending:
+            self.progress_update(f"📦 Waiting for {len(pending)} archive(s) to finish extracting...")
+        while pending:
+            # Short waits so a stop is noticed while extractions are still running
+            pending = list(wait(pending, timeout=0.2).not_done)
+            if self.cancel.is_cancelled():
+                for future in pending:
+                    future.cancel()
+                raise Cancelled()
+        self.archive_futures = []
+
+    def download_rom(self, full_url, filename, console, report=None, mirrors=None, expected_md5s=None):
+        """Download a ROM file to the appropriate console directory"""
+        try:
+            console_dir = os.path.join(self.download_path, "Games", console)
+            os.makedirs(console_dir, exist_ok=True)
+
+            filepath = os.path.join(console_dir, filename)
+
+            if os.path.exists(filepath):
+                self.progress_update(f"⚠️ Skipped (already exists): {filename}")
+                self.finish_download(filename, SKIPPED)
+                return True
+
+            if os.path.exists(get_part_path(filepath)):
+                self.progress_update(f"⏯️ Resuming download: {filename}")
+            else:
+                self.progress_update(f"⬇️ Starting download: {filename}")
+
+            urls = [full_url] + [url for url in (mirrors or []) if url != full_url]
+            self.cancel.raise_if_cancelled()
+            urls = mirror_health.rank(urls)
+            hasher = create_hasher(console, filename)
+            transfer = download_with_mirrors(
+                urls, filepath, config.download_chunk_size,
+                config.segmented_download_threshold, config.segmented_download_segments,
+                session=http_session, hasher=hasher, health=mirror_health,
+                stall_timeout=config.mirror_stall_timeout, cancel=self.cancel
+            )
+            for downloaded, total_size in transfer:
+                # Emit download progress
+                if total_size > 0:
+                    if report:
+                        report(downloaded, total_size)
+                    else:
+                        self.progress_throttle.update(filename, downloaded, total_size)
+
+            self.progress_update(f"✅ Downloaded: {filename} from {urls[0]}")
+            self.finish_download(filename, DOWNLOADED)
+            self.record_verification(filename, console, hasher, expected_md5s)
+            return True
+
+        except Cancelled:
+            self.progress_update(f"⏹️ Stopped: {filename} (partial file kept for resume)")
+            self.finish_download(filename, STOPPED)
+            return False
+        except Exception as e:
+            self.progress_update(f"❌ Failed to download {filename}: {e}")
+            self.finish_download(filename, FAILED)
+            return False
+
+    def finish_download(self, filename, status):
+        """Report a download's outcome, dropping any progress not yet published for it"""
+        self.progress_throttle.discard(filename)
+        self.download_finished(filename, status)
+
+    def record_verification(self, filename, console, hasher, expected_md5s):
+        """Check a finished download against its RetroAchievements hashes"""
+        status = verify(console, hasher, expected_md5s)
+        self.verification[filename] = dict(get_digests(hasher), status=status)
+
+        if status == VERIFIED:
+            self.progress_update(f"🔐 Verified: {filename}")
+        elif status == MISMATCHED:
+            self.progress_update(f"⚠️ Hash mismatch: {filename} doesn't match any RetroAchievements hash")
@@ -27,18 +27,101 @@ class Config:
         self.default_rom_count = 10
         self.max_rom_count = 100
         self.request_delay = 0.5  # seconds between API requests
+        self.api_burst = 2  # requests allowed back-to-back before the delay applies
+        self.api_max_workers = 4
+        self.api_max_retries = 3
+        self.api_cache_ttls = {  # seconds per endpoint; 0 disables caching
+            'API_GetClaims': 0,
+            'API_GetGameHashes': 7 * 24 * 60 * 60,
+            'API_GetGame': 24 * 60 * 60
+        }
+        self.api_cache_max_entries = 5000
         self.download_chunk_size = 8192
+        self.log_retention_lines = 1000  # lines kept in the progress console
+        self.progress_update_hz = 15  # max download progress snapshots per second
+        self.rom_search_download_workers = 4  # concurrent downloads from the ROM Search queue
+        
+        # Download scheduling
+        self.max_concurrent_downloads = 4
+        self.per_host_download_limits = {
+            'myrient.erista.me': 2,
+            'archive.org': 2
+        }
+        self.default_host_download_limit = 2
+        self.segmented_download_threshold = 256 * 1024 * 1024  # bytes
+        self.segmented_download_segments = 4
+        
+        # Archive post-processing
+        self.post_process_archives = False  # test and extract downloaded archives
+        self.delete_archives_after_extract = False
+        self.archive_workers = os.cpu_count() or 1
+        
+        # Listing cache
+        self.cache_dir = os.environ.get('CACHE_DIR', str(Path.home() / '.ra_collector' / 'cache'))
+        self.listing_cache_ttl = 24 * 60 * 60  # seconds before a cached listing is revalidated
+        self.listing_cache_max_bytes = 256 * 1024 * 1024
+        
+        # HTTP transport
+        self.http_connect_timeout = 10  # seconds
+        self.http_read_timeout = 60  # seconds without data before a request fails
+        self.http_pool_connections = 10  # hosts whose pools are kept by the default adapter
+        self.http_pool_maxsize = 10  # keep-alive connections per host
+        self.http_max_retries = 3  # retries of idempotent requests on connection errors and 5xx
+        self.http_backoff_factor = 0.5
+        self.http_host_settings = {  # per-host pool_maxsize, max_retries and backoff_factor
+            'myrient.erista.me': {'pool_maxsize': 16},
+            'archive.org': {'pool_maxsize': 16, 'backoff_factor': 1.0}
+        }
+        self.http_prewarm = True  # open connections to ROM source hosts when a run starts
+        
+        # Mirror health
+        self.mirror_health_ttl = 60 * 60  # seconds before a host's scores are re-probed
+        self.mirror_probe_count = 3  # top ranked candidates probed when scores are stale
+        self.mirror_stall_timeout = 20  # seconds without data before failing over to another mirror
+        
+        # Diagnostics
+        self.diagnostics_dir = os.environ.get('DIAGNOSTICS_DIR', str(Path.home() / '.ra_collector' / 'diagnostics'))
+        self.metrics_enabled = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+        self.profiling_mode = os.environ.get('PROFILING', '').strip().lower()  # '', 'cpu' or 'sample'
+        self.profiling_sample_interval = 0.005  # seconds between stack samples in 'sample' mode
+        self.profiling_memory = os.environ.get('PROFILING_MEMORY', '1') != '0'  # also run tracemalloc
+        self.profiling_top_allocations = 25
+    
+    def get_profiles_dir(self):
+        """Get the folder profiling reports are written to"""
+        return os.path.join(self.diagnostics_dir, 'profiles')
     
-    def save_config(self, api_key=None, download_path=None):
-        """Save configuration to .env file"""
+    def save_config(self, api_key=None, download_path=None, profiling_mode=None):
+        """Save configuration to .env file, keeping any other settings already in it"""
         if api_key is not None:
             self.api_key = api_key
         if download_path is not None:
             self.download_path = download_path
+        if profiling_mode is not None:
+            self.profiling_mode = profiling_mode
+        
+        values = {
+            'API_KEY': self.api_key,
+            'DIRECTORY_PATH': self.download_path,
+            'PROFILING': self.profiling_mode
+        }
+        try:
+            existing = Path('.env').read_text().splitlines()
+        except OSError:
+            existing = []
+        
+        lines = []
+        for line in existing:
+            key = line.split('=', 1)[0].strip()
+            if key in values:
+                lines.append(f"{key}={values.pop(key)}")
+            else:
+                lines.append(line)
+        # Unset optional settings aren't added
+        lines.extend(f"{key}={value}" for key, value in values.items() if value or key != 'PROFILING')
         
-        env_content = f"API_KEY={self.api_key}\nDIRECTORY_PATH={self.download_path}\n"
         with open('.env', 'w') as f:
-            f.write(env_content)
+            f.write("\n".join(lines) + "\n")
     
     def get_api_key(self):
         """Get the API key"""
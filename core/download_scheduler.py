@@ -0,0 +1,135 @@
+"""
+Concurrent download scheduling with per-host connection limits
+"""
+
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+# Label used for the combined progress of all downloads in a run
+AGGREGATE_PROGRESS_LABEL = "All downloads"
+
+
+class DownloadScheduler:
+    """Runs download jobs concurrently, interleaving hosts within their limits"""
+
+    def __init__(self, download_func: Callable, max_workers: int,
+                 host_limits: Optional[Dict[str, int]] = None, default_host_limit: int = 2,
+                 on_progress: Optional[Callable[[str, int, int], None]] = None,
+                 on_complete: Optional[Callable[[int, int], None]] = None,
+                 cancel=None):
+        """
+        Args:
+            download_func: Called as download_func(job, report) and returns success.
+                report(current, total) publishes the job's byte progress.
+            max_workers: Maximum number of concurrent downloads
+            host_limits: Maximum concurrent downloads per host name
+            default_host_limit: Limit for hosts not listed in host_limits
+            on_progress: Receives (filename, current, total) for each job and
+                for AGGREGATE_PROGRESS_LABEL
+            on_complete: Receives (completed_jobs, total_jobs) as jobs finish
+            cancel: Cancellation token; once cancelled no further jobs are started
+        """
+        self.download_func = download_func
+        self.max_workers = max(1, max_workers)
+        self.host_limits = host_limits or {}
+        self.default_host_limit = max(1, default_host_limit)
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.cancel = cancel
+
+        self._cond = threading.Condition()
+        self._progress_lock = threading.Lock()
+        self._job_progress: Dict[int, tuple] = {}
+        self._aggregate = [0, 0]
+
+    @staticmethod
+    def get_host(job: Dict) -> str:
+        """Get the host a job downloads from"""
+        return job.get('host') or urlparse(job['url']).netloc
+
+    def get_host_limit(self, host: str) -> int:
+        """Get the concurrency limit for a host"""
+        return max(1, self.host_limits.get(host, self.default_host_limit))
+
+    def run(self, jobs: List[Dict]) -> List[bool]:
+        """Download all jobs and return their results in job order"""
+        results = [False] * len(jobs)
+        if not jobs:
+            return results
+
+        pending: "OrderedDict[str, deque]" = OrderedDict()
+        for index, job in enumerate(jobs):
+            pending.setdefault(self.get_host(job), deque()).append(index)
+
+        active_per_host: Dict[str, int] = {}
+        state = {'active': 0, 'completed': 0}
+        self._job_progress = {}
+        self._aggregate = [0, 0]
+
+        def finish(index, host, success):
+            with self._cond:
+                results[index] = success
+                active_per_host[host] -= 1
+                state['active'] -= 1
+                state['completed'] += 1
+                completed = state['completed']
+                self._cond.notify_all()
+            if self.on_complete:
+                self.on_complete(completed, len(jobs))
+
+        def work(index, host):
+            success = False
+            try:
+                success = bool(self.download_func(jobs[index], self._make_reporter(index, jobs[index])))
+            except Exception:
+                success = False
+            finally:
+                finish(index, host, success)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            with self._cond:
+                while pending or state['active']:
+                    if pending and self.cancel is not None and self.cancel.is_cancelled():
+                        pending.clear()  # Jobs never started keep their False result
+                        continue
+                    started = False
+                    if state['active'] < self.max_workers:
+                        # Round-robin over hosts so no single host monopolizes the slots
+                        for host in list(pending):
+                            if active_per_host.get(host, 0) >= self.get_host_limit(host):
+                                continue
+                            queue = pending[host]
+                            index = queue.popleft()
+                            if queue:
+                                pending.move_to_end(host)
+                            else:
+                                del pending[host]
+                            active_per_host[host] = active_per_host.get(host, 0) + 1
+                            state['active'] += 1
+                            executor.submit(work, index, host)
+                            started = True
+                            break
+                    if not started:
+                        self._cond.wait()
+
+        return results
+
+    def _make_reporter(self, index: int, job: Dict) -> Callable[[int, int], None]:
+        """Create the progress callback handed to a single job"""
+        filename = job.get('filename', job['url'])
+
+        def report(current: int, total: int) -> None:
+            with self._progress_lock:
+                previous = self._job_progress.get(index, (0, 0))
+                self._job_progress[index] = (current, total)
+                self._aggregate[0] += current - previous[0]
+                self._aggregate[1] += total - previous[1]
+                aggregate_current, aggregate_total = self._aggregate
+            if self.on_progress:
+                self.on_progress(filename, current, total)
+                self.on_progress(AGGREGATE_PROGRESS_LABEL, aggregate_current, aggregate_total)
+
+        return report
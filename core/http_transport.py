@@ -0,0 +1,153 @@
+"""
+Shared HTTP transport with pooled keep-alive connections per host
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import config
+from .rom_sources import ROM_SOURCES
+from utils.metrics import metrics
+
+USER_AGENT = 'RetroAchievements-ROM-Collector/1.0'
+
+try:
+    import brotli  # noqa: F401  (lets urllib3 decode br responses)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class JitteredRetry(Retry):
+    """Retry whose exponential backoff is spread randomly so clients don't retry in lockstep"""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        metrics.count('http_retries_total', host=getattr(_pool, 'host', '') or '')
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default (connect, read) timeout to every request"""
+
+    def __init__(self, timeout, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        if not metrics.enabled:
+            return super().send(request, **kwargs)
+
+        # Only the host and path are traced; query strings can carry the API key
+        parsed = urlparse(request.url)
+        with metrics.span('http.request', method=request.method, host=parsed.netloc, path=parsed.path) as span:
+            started = time.perf_counter()
+            response = super().send(request, **kwargs)
+            # Streamed bodies are read later, so this is the time to the response headers
+            metrics.observe('http_response_seconds', time.perf_counter() - started, host=parsed.netloc)
+            metrics.count('http_requests_total', host=parsed.netloc, status=response.status_code)
+            span.set(status=response.status_code)
+        return response
+
+
+def get_host_settings(host: str) -> Dict:
+    """Get the pool and retry settings for a host, falling back to the defaults"""
+    settings = {
+        'pool_maxsize': config.http_pool_maxsize,
+        'max_retries': config.http_max_retries,
+        'backoff_factor': config.http_backoff_factor
+    }
+    settings.update(config.http_host_settings.get(host, {}))
+    return settings
+
+
+def create_adapter(settings: Dict, pool_connections: int = 1) -> TimeoutHTTPAdapter:
+    """Create a pooled adapter that retries idempotent requests"""
+    retry = JitteredRetry(
+        total=settings['max_retries'],
+        backoff_factor=settings['backoff_factor'],
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+        raise_on_status=False,
+        respect_retry_after_header=True
+    )
+    return TimeoutHTTPAdapter(
+        (config.http_connect_timeout, config.http_read_timeout),
+        pool_connections=pool_connections,
+        pool_maxsize=settings['pool_maxsize'],
+        max_retries=retry
+    )
+
+
+def create_session() -> requests.Session:
+    """Create a session with one connection pool per configured host"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': ACCEPT_ENCODING
+    })
+
+    # Hosts without their own settings share pools in the default adapter
+    default_adapter = create_adapter(get_host_settings(''), config.http_pool_connections)
+    session.mount('https://', default_adapter)
+    session.mount('http://', default_adapter)
+
+    for host in config.http_host_settings:
+        adapter = create_adapter(get_host_settings(host))
+        session.mount(f'https://{host}/', adapter)
+        session.mount(f'http://{host}/', adapter)
+    return session
+
+
+def get_source_hosts(sources: Optional[Dict] = None) -> Dict[str, str]:
+    """Map each ROM source host to one of its listing URLs"""
+    hosts = {}
+    for urls in (sources or ROM_SOURCES).values():
+        for url in ([urls] if isinstance(urls, str) else urls):
+            hosts.setdefault(urlparse(url).netloc, url)
+    return hosts
+
+
+def prewarm(urls: Optional[Iterable[str]] = None, wait: bool = False) -> None:
+    """
+    Open pooled connections to the ROM source hosts ahead of use
+
+    A HEAD request per host pays DNS, TCP and TLS setup in the
+    background, leaving a keep-alive connection for the first real
+    request.
+    """
+    if urls is None:
+        urls = get_source_hosts().values()
+
+    def warm(url):
+        try:
+            http_session.head(url, timeout=config.http_connect_timeout).close()
+        except requests.RequestException:
+            pass
+
+    threads = [threading.Thread(target=warm, args=(url,), daemon=True) for url in urls]
+    for thread in threads:
+        thread.start()
+    if wait:
+        for thread in threads:
+            thread.join()
+
+
+# Shared by every synchronous network path
+http_session = create_session()
@@ -0,0 +1,217 @@
+"""
+Persistent manifest of the ROMs already in the download library
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from utils.text_utils import clean_filename, clean_title, normalize_title
+
+MANIFEST_FILENAME = ".library_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def make_name_key(text: str) -> str:
+    """Normalize a title or saved filename into the same lookup key"""
+    # clean_filename turns spaces and dashes into underscores, so apply it to both sides
+    return normalize_title(clean_filename(clean_title(text)))
+
+
+def collect_md5s(digests: Dict) -> Set[str]:
+    """Get every MD5 in a file's digests, including archive members"""
+    md5s = set()
+    for record in [digests] + list(digests.get('members', {}).values()):
+        for key in ('md5', 'md5_headerless'):
+            if record.get(key):
+                md5s.add(record[key])
+    return md5s
+
+
+class LibraryManifest:
+    """
+    Index of the files under <download_path>/Games
+
+    Entries are keyed by "console/filename" and hold the size, mtime,
+    hashes, source URL and RetroAchievements game ID of each file, so
+    owned games can be recognised without touching the network.
+    """
+
+    def __init__(self, download_path: str, save_interval: float = 1.0):
+        self.games_dir = os.path.join(download_path, "Games")
+        self.path = os.path.join(self.games_dir, MANIFEST_FILENAME)
+        self.save_interval = save_interval
+        self.entries: Dict[str, Dict] = {}
+        self._by_game_id: Dict[Tuple[str, int], str] = {}
+        self._by_name: Dict[Tuple[str, str], str] = {}
+        self._by_md5: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    @staticmethod
+    def make_key(console: str, filename: str) -> str:
+        """Build the entry key for a file"""
+        return f"{console}/{filename}"
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != MANIFEST_VERSION:
+            return
+        for key, entry in data.get('entries', {}).items():
+            self._index(key, entry)
+
+    def _index(self, key: str, entry: Dict) -> None:
+        self.entries[key] = entry
+        console = entry['console']
+        if entry.get('game_id') is not None:
+            self._by_game_id[(console, entry['game_id'])] = key
+        for name_key in entry.get('names', []):
+            self._by_name[(console, name_key)] = key
+        for md5 in entry.get('md5s', []):
+            self._by_md5[(console, md5)] = key
+
+    def _unindex(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        lookups = [(self._by_game_id, entry.get('game_id'))]
+        lookups += [(self._by_name, name_key) for name_key in entry.get('names', [])]
+        lookups += [(self._by_md5, md5) for md5 in entry.get('md5s', [])]
+        for index, value in lookups:
+            if index.get((entry['console'], value)) == key:
+                del index[(entry['console'], value)]
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Bring the manifest in line with the files on disk
+
+        Only directory entries are stat'ed; files whose size and mtime
+        are unchanged keep their hashes and game IDs.
+
+        Returns:
+            Dict with 'added', 'changed' and 'removed' counts
+        """
+        counts = {'added': 0, 'changed': 0, 'removed': 0}
+        seen = set()
+
+        with self._lock:
+            try:
+                with os.scandir(self.games_dir) as items:
+                    console_dirs = [item for item in items if item.is_dir()]
+            except OSError:
+                console_dirs = []
+
+            for console_dir in console_dirs:
+                try:
+                    with os.scandir(console_dir.path) as items:
+                        files = [(item.name, item.stat()) for item in items
+                                 if not item.name.startswith('.') and item.is_file()
+                                 and not item.name.endswith(('.part', '.part.json'))]
+                except OSError:
+                    continue
+
+                for filename, stat in files:
+                    key = self.make_key(console_dir.name, filename)
+                    seen.add(key)
+                    entry = self.entries.get(key)
+                    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+                        continue
+                    counts['changed' if entry else 'added'] += 1
+                    self._unindex(key)
+                    self._index(key, self._new_entry(console_dir.name, filename, stat))
+                    self._dirty = True
+
+            for key in [key for key in self.entries if key not in seen]:
+                self._unindex(key)
+                counts['removed'] += 1
+                self._dirty = True
+
+        self.flush()
+        return counts
+
+    @staticmethod
+    def _new_entry(console: str, filename: str, stat) -> Dict:
+        return {
+            'console': console,
+            'filename': filename,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'names': [make_name_key(filename)],
+            'md5s': []
+        }
+
+    def find(self, console: str, game_id: Optional[int] = None, title: Optional[str] = None,
+             md5s: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """Find an owned file by RetroAchievements game ID, title or hash"""
+        with self._lock:
+            key = None
+            if game_id is not None:
+                key = self._by_game_id.get((console, game_id))
+            if key is None and title:
+                key = self._by_name.get((console, make_name_key(title)))
+            if key is None and md5s:
+                key = next((self._by_md5[(console, md5)] for md5 in md5s if (console, md5) in self._by_md5), None)
+            return self.entries.get(key) if key else None
+
+    def record(self, console: str, filename: str, game_id: Optional[int] = None,
+               title: Optional[str] = None, source_url: Optional[str] = None,
+               digests: Optional[Dict] = None, status: Optional[str] = None) -> Optional[Dict]:
+        """Add or update the entry for a file in the library"""
+        filepath = os.path.join(self.games_dir, console, filename)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+
+        with self._lock:
+            key = self.make_key(console, filename)
+            entry = self.entries.get(key)
+            self._unindex(key)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+                # A changed file keeps nothing from the old entry
+                entry = self._new_entry(console, filename, stat)
+
+            if game_id is not None:
+                entry['game_id'] = game_id
+            if title and make_name_key(title) not in entry['names']:
+                entry['names'].append(make_name_key(title))
+            if source_url:
+                entry['source_url'] = source_url
+            if digests:
+                entry['digests'] = digests
+                entry['md5s'] = sorted(set(entry['md5s']) | collect_md5s(digests))
+            if status:
+                entry['status'] = status
+
+            self._index(key, entry)
+            self._dirty = True
+            save_due = time.monotonic() - self._last_save >= self.save_interval
+
+        if save_due:
+            self.flush()
+        return entry
+
+    def flush(self) -> None:
+        """Write the manifest to disk if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': MANIFEST_VERSION, 'entries': self.entries}
+            try:
+                os.makedirs(self.games_dir, exist_ok=True)
+                temp_path = self.path + ".tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+                self._dirty = False
+            except OSError:
+                pass
+            self._last_save = time.monotonic()
@@ -0,0 +1,221 @@
+"""
+Persistent cache for parsed ROM source directory listings
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from .config import config
+from .http_transport import http_session
+from .listing_parser import iter_listing
+from utils.cancellation import Cancelled, abort_on_cancel
+from utils.metrics import metrics
+
+
+class ListingCache:
+    """Disk-backed cache of parsed directory listings keyed by source URL"""
+
+    def __init__(self, cache_dir: str, ttl: float, max_bytes: int, max_memory_entries: int = 8):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _record_path(self, url: str) -> str:
+        """Get the cache file path for a source URL"""
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Get the cached record for a source URL, if any"""
+        with self._lock:
+            path = self._record_path(url)
+            record = self._memory.get(url)
+            if record is None:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        record = json.load(f)
+                except (OSError, ValueError):
+                    return None
+                if record.get('url') != url:
+                    return None
+            self._remember(url, record)
+
+            # File mtime doubles as the LRU access time
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            return record
+
+    def is_fresh(self, record: Dict) -> bool:
+        """Check if a record can be served without revalidation"""
+        return time.time() - record.get('fetched_at', 0) < self.ttl
+
+    def get_validators(self, record: Optional[Dict]) -> Dict[str, str]:
+        """Get conditional request headers for revalidating a record"""
+        headers = {}
+        if record:
+            if record.get('etag'):
+                headers['If-None-Match'] = record['etag']
+            if record.get('last_modified'):
+                headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def put(self, url: str, entries: List[Dict], etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> Dict:
+        """Store freshly parsed entries for a source URL"""
+        record = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'entries': entries
+        }
+        with self._lock:
+            self._remember(url, record)
+            self._write(url, record)
+            self._evict()
+        return record
+
+    def mark_revalidated(self, url: str, record: Dict) -> None:
+        """Reset the TTL of a record after a 304 Not Modified response"""
+        with self._lock:
+            record['fetched_at'] = time.time()
+            self._remember(url, record)
+            self._write(url, record)
+
+    def fetch(self, url: str, session=None, cancel=None) -> List[Dict]:
+        """Get listing entries for a source URL, fetching only when stale"""
+        return list(self.iter_entries(url, session, cancel=cancel))
+
+    def iter_entries(self, url: str, session=None, chunk_size: int = 65536,
+                     cancel=None) -> Iterator[Dict]:
+        """
+        Yield listing entries for a source URL, streaming them on a cache miss
+
+        The page is parsed as it downloads. If the caller stops iterating
+        early the connection is closed and nothing is cached; a listing is
+        only stored once it has been read to the end. Cancelling `cancel`
+        aborts the download and raises Cancelled.
+        """
+        record = self.get(url)
+        if record and self.is_fresh(record):
+            metrics.count('listing_cache_requests_total', result='hit')
+            yield from record['entries']
+            return
+
+        http = session or http_session
+        response = http.get(url, headers=self.get_validators(record), stream=True)
+        try:
+            if response.status_code == 304 and record:
+                metrics.count('listing_cache_requests_total', result='revalidated')
+                self.mark_revalidated(url, record)
+                yield from record['entries']
+                return
+            response.raise_for_status()
+            metrics.count('listing_cache_requests_total', result='miss')
+
+            # Without an explicit charset requests assumes ISO-8859-1 for HTML
+            content_type = response.headers.get('Content-Type', '').lower()
+            encoding = response.encoding if 'charset=' in content_type else 'utf-8'
+
+            entries = []
+            with abort_on_cancel(cancel, response):
+                try:
+                    for entry in iter_listing(response.iter_content(chunk_size), url, encoding):
+                        entries.append(entry)
+                        yield entry
+                except Exception:
+                    if cancel is not None and cancel.is_cancelled():
+                        raise Cancelled()
+                    raise
+            # An aborted read can end like a short page, which must not be cached
+            if cancel is not None and cancel.is_cancelled():
+                raise Cancelled()
+
+            self.put(url, entries, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        finally:
+            response.close()
+
+    def forget(self, url: str) -> None:
+        """Drop a listing from memory once the caller keeps its own copy; the disk copy stays"""
+        with self._lock:
+            self._memory.pop(url, None)
+
+    def clear(self) -> None:
+        """Remove all cached listings"""
+        with self._lock:
+            self._memory.clear()
+            for path, _, _ in self._list_files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _remember(self, url: str, record: Dict) -> None:
+        """Keep a record in the in-memory LRU layer"""
+        self._memory[url] = record
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _write(self, url: str, record: Dict) -> None:
+        """Atomically write a record to disk"""
+        path = self._record_path(url)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # A cache that can't be written is just a cache miss next time
+
+    def _list_files(self):
+        """List cache files as (path, size, mtime) tuples"""
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.json'):
+                        stat = entry.stat()
+                        files.append((entry.path, stat.st_size, stat.st_mtime))
+        except OSError:
+            pass
+        return files
+
+    def _evict(self) -> None:
+        """Delete least recently used listings until under the size cap"""
+        files = self._list_files()
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return
+
+        for path, size, _ in sorted(files, key=lambda f: f[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        evicted = [url for url in self._memory if not os.path.exists(self._record_path(url))]
+        for url in evicted:
+            del self._memory[url]
+
+
+# Global listing cache instance
+listing_cache = ListingCache(
+    os.path.join(config.cache_dir, 'listings'),
+    config.listing_cache_ttl,
+    config.listing_cache_max_bytes
+)
@@ -0,0 +1,136 @@
+"""
+Directory listing parsing for Myrient and Archive.org sources
+"""
+
+import codecs
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from urllib.parse import urljoin, unquote
+
+
+def is_archive_source(url: str) -> bool:
+    """Check if a source URL points at Archive.org"""
+    return "archive.org" in url
+
+
+def get_archive_collection(url: str) -> str:
+    """Extract the collection path from an Archive.org download URL"""
+    # E.g., https://archive.org/download/nointro.atari-2600 => nointro.atari-2600
+    return url.split("/download/")[-1].strip("/")
+
+
+class ListingTokenizer(HTMLParser):
+    """
+    Incremental tokenizer for directory listing pages
+
+    Myrient file links sit in td.link cells and are reported as soon as
+    their anchor closes. Other anchors are only used when a page has no
+    td.link cells at all, which is the Archive.org format.
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.is_archive = is_archive_source(base_url)
+        self.archive_collection = get_archive_collection(base_url) if self.is_archive else ""
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.ready: List[Dict] = []
+        self.fallback: List[Dict] = []
+        self.seen_link_cells = False
+        self._in_link_cell = False
+        self._anchor: Optional[Dict] = None
+        self._anchor_text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'td':
+            classes = (dict(attrs).get('class') or '').split()
+            self._in_link_cell = 'link' in classes
+            if self._in_link_cell:
+                self.seen_link_cells = True
+        elif tag == 'a':
+            attributes = dict(attrs)
+            if attributes.get('href') is not None:
+                self._anchor = {
+                    'href': attributes['href'],
+                    'title': attributes.get('title'),
+                    'in_link_cell': self._in_link_cell
+                }
+                self._anchor_text = []
+
+    def handle_endtag(self, tag):
+        if tag == 'td':
+            self._in_link_cell = False
+        elif tag == 'a' and self._anchor is not None:
+            anchor, self._anchor = self._anchor, None
+            entry = self._make_entry(anchor['href'], anchor['title'] or ''.join(self._anchor_text))
+            if entry is None:
+                return
+            if self.is_archive or anchor['in_link_cell']:
+                self.ready.append(entry)
+            elif not self.seen_link_cells:
+                self.fallback.append(entry)
+
+    def handle_data(self, data):
+        if self._anchor is not None:
+            self._anchor_text.append(data)
+
+    def _make_entry(self, href: str, title: str) -> Optional[Dict]:
+        """Build a file entry from an anchor, skipping directories"""
+        if href in ['../', '/'] or href.endswith('/'):
+            return None
+
+        filename = unquote(href)
+        if self.is_archive:
+            full_url = f"https://archive.org/download/{self.archive_collection}/{filename}"
+        else:
+            full_url = urljoin(self.base_url, href)
+
+        return {
+            'title': title,
+            'href': href,
+            'filename': filename,
+            'url': full_url
+        }
+
+    def take_ready(self) -> List[Dict]:
+        """Take the entries completed since the last call"""
+        ready, self.ready = self.ready, []
+        return ready
+
+    def take_remaining(self) -> List[Dict]:
+        """Take what's left once the page has been fully fed"""
+        self.close()
+        remaining = self.take_ready()
+        if not self.seen_link_cells:
+            remaining.extend(self.fallback)
+        self.fallback = []
+        return remaining
+
+
+def iter_listing(chunks: Iterable[Union[bytes, str]], base_url: str, encoding: str = 'utf-8') -> Iterator[Dict]:
+    """
+    Parse a listing page incrementally as its chunks arrive
+
+    Entries are yielded as soon as they are complete, so callers can stop
+    iterating (and reading from the network) once they find what they need.
+    """
+    tokenizer = ListingTokenizer(base_url)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        tokenizer.feed(chunk)
+        yield from tokenizer.take_ready()
+
+    tokenizer.feed(decoder.decode(b'', final=True))
+    yield from tokenizer.take_remaining()
+
+
+def parse_listing(html: Union[bytes, str], base_url: str) -> List[Dict]:
+    """
+    Parse a directory listing page into file entries
+
+    Returns:
+        List of dicts with 'title', 'href', 'filename' and 'url' keys
+    """
+    return list(iter_listing([html], base_url))
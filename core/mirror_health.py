@@ -0,0 +1,180 @@
+"""
+Per-host mirror health tracking and source ranking
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from .config import config
+from .http_transport import http_session
+
+# Transfer size used to weigh first-byte latency against throughput
+REFERENCE_SIZE = 16 * 1024 * 1024
+PROBE_BYTES = 64 * 1024
+
+
+class MirrorHealth:
+    """
+    Rolling per-host record of time-to-first-byte, throughput and error rate
+
+    Each measurement updates an exponentially weighted moving average, so
+    recent behaviour dominates. The record is persisted between runs.
+    """
+
+    def __init__(self, path: str, ttl: float, alpha: float = 0.3, save_interval: float = 1.0):
+        """
+        Args:
+            path: JSON file the record is kept in
+            ttl: Seconds after which a host's scores are re-probed
+            alpha: Weight of the newest measurement in each average
+        """
+        self.path = path
+        self.ttl = ttl
+        self.alpha = alpha
+        self.save_interval = save_interval
+        self.hosts: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes, which share a temp file
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        """Get the host a URL is served from"""
+        return urlparse(url).netloc
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.hosts = json.load(f)
+        except (OSError, ValueError):
+            self.hosts = {}
+
+    def _update(self, host: str, **samples) -> None:
+        """Fold new samples into a host's moving averages"""
+        with self._lock:
+            record = self.hosts.setdefault(host, {})
+            for key, value in samples.items():
+                previous = record.get(key)
+                record[key] = value if previous is None else previous + self.alpha * (value - previous)
+            record['samples'] = record.get('samples', 0) + 1
+            record['updated_at'] = time.time()
+            self._dirty = True
+            save_due = time.monotonic() - self._last_save >= self.save_interval
+        if save_due:
+            self.flush()
+
+    def record_transfer(self, url: str, ttfb: float, size: int, seconds: float) -> None:
+        """Record a successful request's first-byte latency and throughput"""
+        samples = {'ttfb': max(0.0, ttfb), 'error_rate': 0.0}
+        if size > 0 and seconds > 0:
+            samples['throughput'] = size / seconds
+        self._update(self.get_host(url), **samples)
+
+    def record_error(self, url: str) -> None:
+        """Record a failed or stalled request"""
+        self._update(self.get_host(url), error_rate=1.0)
+
+    def estimate_cost(self, url: str) -> Optional[float]:
+        """
+        Estimate the seconds a reference-sized download from a URL's host takes
+
+        Returns None for hosts without measurements.
+        """
+        record = self.hosts.get(self.get_host(url))
+        if not record or 'ttfb' not in record:
+            return None
+        throughput = record.get('throughput') or 1.0
+        cost = record['ttfb'] + REFERENCE_SIZE / throughput
+        # Every expected failure costs roughly another attempt
+        return cost / max(0.05, 1.0 - record.get('error_rate', 0.0))
+
+    def is_stale(self, url: str) -> bool:
+        """Check if a URL's host has no recent measurements"""
+        record = self.hosts.get(self.get_host(url))
+        return not record or time.time() - record.get('updated_at', 0) >= self.ttl
+
+    def rank(self, urls: List[str], probe: bool = True) -> List[str]:
+        """
+        Order candidate URLs from healthiest to least healthy host
+
+        When several candidates are known and some have stale scores, the
+        stale ones among the top `mirror_probe_count` are probed
+        concurrently first. Hosts never measured keep their original
+        order after the measured ones.
+        """
+        if len(urls) < 2:
+            return list(urls)
+
+        if probe:
+            stale = [url for url in self._sort(urls)[:config.mirror_probe_count] if self.is_stale(url)]
+            # Probe one URL per host
+            by_host = {self.get_host(url): url for url in reversed(stale)}
+            if by_host:
+                with ThreadPoolExecutor(max_workers=len(by_host)) as executor:
+                    list(executor.map(self.probe, by_host.values()))
+
+        return self._sort(urls)
+
+    def _sort(self, urls: List[str]) -> List[str]:
+        def key(item):
+            index, url = item
+            cost = self.estimate_cost(url)
+            return (cost is None, cost or 0.0, index)
+        return [url for _, url in sorted(enumerate(urls), key=key)]
+
+    def probe(self, url: str) -> None:
+        """Measure a URL's host with a small ranged request"""
+        started = time.monotonic()
+        try:
+            response = http_session.get(
+                url, stream=True, timeout=(config.http_connect_timeout, config.mirror_stall_timeout),
+                headers={'Range': f"bytes=0-{PROBE_BYTES - 1}", 'Accept-Encoding': 'identity'}
+            )
+            try:
+                response.raise_for_status()
+                first_byte = time.monotonic()
+                size = 0
+                for chunk in response.iter_content(chunk_size=16384):
+                    size += len(chunk)
+                    if size >= PROBE_BYTES:
+                        break
+            finally:
+                response.close()
+        except Exception:
+            self.record_error(url)
+            return
+        self.record_transfer(url, first_byte - started, size, time.monotonic() - first_byte)
+
+    def flush(self) -> None:
+        """Write the record to disk if it changed"""
+        # Snapshot under the write lock too, so an older record never replaces a newer one
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self.hosts)
+                self._dirty = False
+                self._last_save = time.monotonic()
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                temp_path = self.path + ".tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_path, self.path)
+            except OSError:
+                pass  # Losing the record only costs a re-probe
+
+
+# Shared by the collector and the ROM Search tab
+mirror_health = MirrorHealth(
+    os.path.join(config.cache_dir, 'mirror_health.json'),
+    config.mirror_health_ttl
+)
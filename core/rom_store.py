@@ -0,0 +1,240 @@
+"""
+Compact columnar storage for ROM listings
+"""
+
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+RECORD_KEYS = ('name', 'extension', 'url', 'sources')
+
+# Stored instead of a URL's last segment when it can be rebuilt from the file name
+LEAF_QUOTED = None  # Myrient style: the URL-quoted file name
+LEAF_PLAIN = False  # Archive.org style: the file name as is
+
+# (listing base ID, URL prefix ID, last URL segment or a LEAF_ constant)
+Source = Tuple[int, int, Union[str, None, bool]]
+
+
+class ROMStore(Sequence):
+    """
+    One console's ROMs stored column by column instead of a dict per file
+
+    Extensions, listing base URLs and URL directory prefixes are each
+    stored once and referenced by small integer IDs. A download URL keeps
+    only its last path segment, and not even that when it can be rebuilt
+    from the file name. Indexing returns lightweight ROMRecord views that
+    build values on access, and select() returns a ROMView of positions
+    instead of copying records.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.extensions: List[str] = []
+        self.extension_ids = array('H')
+        self.bases: List[str] = []
+        self.prefixes: List[str] = []
+        self.source_bases = array('H')
+        self.source_prefixes = array('H')
+        self.source_leaves: List[Union[str, None, bool]] = []
+        # Further sources of ROMs listed more than once, sorted by position when finished
+        self.extra_positions = array('I')
+        self.extra_bases = array('H')
+        self.extra_prefixes = array('H')
+        self.extra_leaves: List[Union[str, None, bool]] = []
+        self._ids: Dict[Tuple[str, str], int] = {}
+        # name -> position, only while the store is being filled
+        self._positions: Optional[Dict[str, int]] = {}
+
+    @classmethod
+    def from_listings(cls, listings: Iterable[Tuple[str, Iterable[Dict]]]) -> 'ROMStore':
+        """Build a store from (base_url, listing entries) pairs"""
+        store = cls()
+        for base_url, entries in listings:
+            store.add_entries(base_url, entries)
+        store.finish()
+        return store
+
+    def _intern(self, table: List[str], kind: str, value: str) -> int:
+        key = (kind, value)
+        item_id = self._ids.get(key)
+        if item_id is None:
+            item_id = self._ids[key] = len(table)
+            table.append(value)
+        return item_id
+
+    def _encode_source(self, base_url: str, url: str, filename: str) -> Source:
+        split = url.rfind('/') + 1
+        prefix, leaf = url[:split], url[split:]
+        if leaf == filename:
+            leaf = LEAF_PLAIN
+        elif leaf == quote(filename):
+            leaf = LEAF_QUOTED
+        return (
+            self._intern(self.bases, 'base', base_url),
+            self._intern(self.prefixes, 'prefix', prefix),
+            leaf
+        )
+
+    def add(self, name: str, extension: str, base_url: str, url: str) -> int:
+        """
+        Add a ROM found in a listing, merging it with an earlier ROM of the same name
+
+        Returns:
+            The ROM's position
+        """
+        if self._positions is None:
+            raise RuntimeError("ROMStore is read-only once finished")
+
+        position = self._positions.get(name)
+        if position is not None:
+            filename = name + self.extensions[self.extension_ids[position]]
+            base_id, prefix_id, leaf = self._encode_source(base_url, url, filename)
+            self.extra_positions.append(position)
+            self.extra_bases.append(base_id)
+            self.extra_prefixes.append(prefix_id)
+            self.extra_leaves.append(leaf)
+            return position
+
+        position = len(self.names)
+        self._positions[name] = position
+        self.names.append(name)
+        self.extension_ids.append(self._intern(self.extensions, 'extension', extension))
+        base_id, prefix_id, leaf = self._encode_source(base_url, url, name + extension)
+        self.source_bases.append(base_id)
+        self.source_prefixes.append(prefix_id)
+        self.source_leaves.append(leaf)
+        return position
+
+    def add_entries(self, base_url: str, entries: Iterable[Dict]) -> int:
+        """Add every file in a listing, returning how many had an extension"""
+        added = 0
+        for entry in entries:
+            name, extension = os.path.splitext(entry['filename'])
+            if extension:
+                self.add(name, extension, base_url, entry['url'])
+                added += 1
+        return added
+
+    def finish(self) -> None:
+        """Sort the extra sources for lookup and drop the tables only needed while filling"""
+        order = sorted(range(len(self.extra_positions)), key=self.extra_positions.__getitem__)
+        self.extra_positions = array('I', (self.extra_positions[i] for i in order))
+        self.extra_bases = array('H', (self.extra_bases[i] for i in order))
+        self.extra_prefixes = array('H', (self.extra_prefixes[i] for i in order))
+        self.extra_leaves = [self.extra_leaves[i] for i in order]
+        self._positions = None
+        self._ids = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return ROMView(self, range(len(self))[position])
+        if position < 0:
+            position += len(self.names)
+        if not 0 <= position < len(self.names):
+            raise IndexError("ROM position out of range")
+        return ROMRecord(self, position)
+
+    def name_at(self, position: int) -> str:
+        return self.names[position]
+
+    def extension_at(self, position: int) -> str:
+        return self.extensions[self.extension_ids[position]]
+
+    def _decode_source(self, position: int, source: Source) -> Dict[str, str]:
+        base_id, prefix_id, leaf = source
+        if leaf is LEAF_QUOTED:
+            leaf = quote(self.names[position] + self.extension_at(position))
+        elif leaf is LEAF_PLAIN:
+            leaf = self.names[position] + self.extension_at(position)
+        return {'base_url': self.bases[base_id], 'full_url': self.prefixes[prefix_id] + leaf}
+
+    def url_at(self, position: int) -> str:
+        """Get the URL from the first listing a ROM was found in"""
+        return self.sources_at(position)[0]['full_url']
+
+    def sources_at(self, position: int) -> List[Dict[str, str]]:
+        """Get every listing a ROM was found in, as base_url and full_url dicts"""
+        sources = [(self.source_bases[position], self.source_prefixes[position], self.source_leaves[position])]
+        first = bisect_left(self.extra_positions, position)
+        last = bisect_right(self.extra_positions, position, first)
+        for i in range(first, last):
+            sources.append((self.extra_bases[i], self.extra_prefixes[i], self.extra_leaves[i]))
+        return [self._decode_source(position, source) for source in sources]
+
+    def select(self, positions: Iterable[int]) -> 'ROMView':
+        """Get a view of some of the ROMs, in the given order"""
+        return ROMView(self, positions)
+
+
+class ROMView(Sequence):
+    """A read-only selection of a ROMStore's ROMs, holding positions instead of records"""
+
+    def __init__(self, store: ROMStore, positions: Iterable[int]):
+        self.store = store
+        self.positions = positions if isinstance(positions, (array, range)) else array('I', positions)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ROMView(self.store, self.positions[index])
+        return ROMRecord(self.store, self.positions[index])
+
+    def name_at(self, index: int) -> str:
+        return self.store.names[self.positions[index]]
+
+    def extension_at(self, index: int) -> str:
+        return self.store.extension_at(self.positions[index])
+
+    def select(self, indexes: Iterable[int]) -> 'ROMView':
+        return ROMView(self.store, array('I', (self.positions[i] for i in indexes)))
+
+
+class ROMRecord(Mapping):
+    """
+    Read-only dict-like view of one ROM in a store
+
+    Supports rom['name'], rom.get('sources', []) and dict(rom, ...) like
+    the per-file dicts it replaces.
+    """
+
+    __slots__ = ('store', 'position')
+
+    def __init__(self, store: ROMStore, position: int):
+        self.store = store
+        self.position = position
+
+    def __getitem__(self, key):
+        if key == 'name':
+            return self.store.names[self.position]
+        if key == 'extension':
+            return self.store.extension_at(self.position)
+        if key == 'url':
+            return self.store.url_at(self.position)
+        if key == 'sources':
+            return self.store.sources_at(self.position)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(RECORD_KEYS)
+
+    def __len__(self) -> int:
+        return len(RECORD_KEYS)
+
+    def __eq__(self, other):
+        if isinstance(other, ROMRecord):
+            return self.store is other.store and self.position == other.position
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ROMRecord({self['name'] + self['extension']!r})"
@@ -0,0 +1,168 @@
+"""
+Trigram index for fast regex and substring search over ROM listings
+"""
+
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+try:
+    from re._casefix import _EXTRA_CASES
+except ImportError:
+    _EXTRA_CASES = {}
+
+# Characters the regex engine treats as case-equivalent beyond str.lower()
+# (e.g. 'ſ' matches 's'), folded onto one representative
+_FOLD_TABLE = {}
+for _code, _others in _EXTRA_CASES.items():
+    _FOLD_TABLE[_code] = chr(min((_code,) + tuple(_others)))
+
+_REPEAT_OPS = tuple(
+    getattr(sre_constants, name)
+    for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+    if hasattr(sre_constants, name)
+)
+
+
+def fold_text(text: str) -> str:
+    """Lowercase text for indexing, one character in, one character out"""
+    if text.isascii():
+        return text.lower()
+    return ''.join(c.lower()[:1] for c in text).translate(_FOLD_TABLE)
+
+
+def _literal_runs(parsed) -> List[str]:
+    """Collect runs of literal characters every match must contain"""
+    runs = []
+    current = []
+
+    def flush():
+        if current:
+            runs.append(''.join(current))
+            current.clear()
+
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            current.append(chr(av))
+        elif op is sre_constants.AT:
+            continue  # Anchors and \b are zero-width, so the run stays contiguous
+        elif op is sre_constants.SUBPATTERN:
+            flush()
+            runs.extend(_literal_runs(av[-1]))
+        elif op in _REPEAT_OPS:
+            flush()
+            min_count, _, item = av
+            if min_count >= 1:
+                runs.extend(_literal_runs(item))
+        else:
+            flush()
+    flush()
+    return runs
+
+
+def extract_literals(pattern: str, flags: int = 0) -> List[str]:
+    """Extract the literal strings any match of a pattern must contain"""
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+    return _literal_runs(parsed)
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def iter_names(roms: Sequence) -> Iterator[Tuple[str, str]]:
+    """Yield each ROM's (name, extension), reading a ROMStore's columns directly"""
+    if hasattr(roms, 'name_at'):
+        return ((roms.name_at(i), roms.extension_at(i)) for i in range(len(roms)))
+    return ((rom['name'], rom.get('extension', '')) for rom in roms)
+
+
+class TrigramIndex:
+    """Maps every trigram of ROM names and extensions to the ROMs containing it"""
+
+    def __init__(self, roms: Sequence[Dict]):
+        self.roms = roms
+        postings: Dict[str, list] = {}
+        for i, (name, extension) in enumerate(iter_names(roms)):
+            # The separator keeps trigrams from spanning name and extension
+            text = fold_text(name) + '\0' + fold_text(extension)
+            for gram in _trigrams(text):
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = [i]
+                else:
+                    ids.append(i)
+        self.postings = {gram: array('I', ids) for gram, ids in postings.items()}
+
+    def candidates(self, literals: List[str]) -> Optional[List[int]]:
+        """
+        Get the ROM positions that contain all the literals
+
+        Returns None when the literals are too short to narrow anything down.
+        """
+        grams = set()
+        for literal in literals:
+            grams |= _trigrams(fold_text(literal))
+        if not grams:
+            return None
+
+        postings = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        if not postings[0]:
+            return []
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return sorted(result)
+
+
+def compile_search(search_text: str, case_sensitive: bool, whole_word: bool):
+    """Compile the search box text the way the ROM Search tab interprets it"""
+    pattern = search_text
+    if whole_word:
+        pattern = r'\b' + pattern + r'\b'
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+def filter_roms(roms: Sequence[Dict], search_text: str, case_sensitive: bool = False,
+                whole_word: bool = False, index: Optional[TrigramIndex] = None) -> Sequence[Dict]:
+    """
+    Filter ROMs whose name or extension matches a regex
+
+    With an index, only ROMs containing the pattern's required literals
+    are checked against the full regex. A ROMStore or ROMView is searched
+    column by column and filtered into a view. Raises re.error for bad
+    patterns.
+    """
+    regex = compile_search(search_text, case_sensitive, whole_word)
+
+    candidates = None
+    if index is not None:
+        candidates = index.candidates(extract_literals(regex.pattern, regex.flags))
+
+    if hasattr(roms, 'select'):
+        search, name_at, extension_at = regex.search, roms.name_at, roms.extension_at
+        positions = range(len(roms)) if candidates is None else candidates
+        return roms.select(i for i in positions if search(name_at(i)) or search(extension_at(i)))
+
+    if candidates is None:
+        source = roms
+    else:
+        source = (roms[i] for i in candidates)
+
+    return [
+        rom for rom in source
+        if regex.search(rom['name']) or regex.search(rom.get('extension', ''))
+    ]
@@ -0,0 +1,115 @@
+"""
+Title resolution against a console's ROM source listings
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .listing_parser import is_archive_source
+from utils.text_utils import clean_title, clean_filename, normalize_title
+
+# File types accepted from Archive.org collections
+ARCHIVE_ROM_EXTENSIONS = ('.zip', '.7z', '.rar', '.nes', '.smc', '.gba', '.bin', '.iso')
+
+# Entries that must arrive in name order before a listing is trusted to be sorted
+MIN_SORTED_ENTRIES = 32
+
+
+def make_candidate(source_url: str, entry: Dict) -> Optional[Tuple[str, Dict]]:
+    """Build a (match text, candidate) pair from a listing entry"""
+    if is_archive_source(source_url):
+        filename = os.path.basename(entry['filename'])
+        if not filename.lower().endswith(ARCHIVE_ROM_EXTENSIONS):
+            return None
+        match_text = filename
+    else:
+        filename = os.path.basename(entry['href'])
+        match_text = entry['title']
+
+    return match_text, {
+        'url': entry['url'],
+        'filename': clean_filename(filename),
+        'source': source_url,
+        'host': urlparse(source_url).netloc,
+        'mirrors': [entry['url']]
+    }
+
+
+class TitleResolver:
+    """Resolves titles to downloadable files using a normalized-name index"""
+
+    def __init__(self, listings: List[Tuple[str, List[Dict]]]):
+        """
+        Build the index from (source_url, entries) pairs
+
+        Earlier sources take precedence when several hold the same name;
+        identical files in later sources are kept as mirrors.
+        """
+        self.candidates: List[Tuple[str, Dict]] = []
+        self.index: Dict[str, Dict] = {}
+
+        for source_url, entries in listings:
+            for entry in entries:
+                pair = make_candidate(source_url, entry)
+                if pair is None:
+                    continue
+                match_text, candidate = pair
+                self.candidates.append((match_text.lower(), candidate))
+
+                key = normalize_title(clean_title(match_text))
+                existing = self.index.setdefault(key, candidate)
+                if existing is not candidate and existing['filename'] == candidate['filename']:
+                    # Same file in another source, usable as a download mirror
+                    existing['mirrors'].append(candidate['url'])
+
+    def resolve(self, title: str) -> Optional[Dict]:
+        """Find the best candidate for a cleaned title"""
+        candidate = self.index.get(normalize_title(title))
+        if candidate is not None:
+            return candidate
+
+        # Fall back to substring matching for titles that aren't exact names
+        needle = title.lower()
+        for match_text, candidate in self.candidates:
+            if needle in match_text:
+                return candidate
+        return None
+
+
+def search_entries(title: str, source_url: str, entries: Iterable[Dict]) -> Tuple[Optional[Dict], bool]:
+    """
+    Search a stream of listing entries for a title, reading no more than needed
+
+    Stops at an exact match. A substring match is only returned once an
+    exact one can no longer follow: at the end of the entries or, in a
+    listing sorted by name, once the names have passed the title.
+
+    Returns:
+        Tuple of (candidate or None, whether it is an exact match)
+    """
+    key = normalize_title(title)
+    needle = title.lower()
+    fallback = None
+    previous_key = ''
+    sorted_entries = 0
+
+    for entry in entries:
+        pair = make_candidate(source_url, entry)
+        if pair is None:
+            continue
+        match_text, candidate = pair
+        name_key = normalize_title(clean_title(match_text))
+        if name_key == key:
+            return candidate, True
+        if fallback is None and needle in match_text.lower():
+            fallback = candidate
+
+        # -1 marks a listing seen out of order, which disables the early stop
+        if sorted_entries >= 0:
+            sorted_entries = sorted_entries + 1 if name_key >= previous_key else -1
+            previous_key = name_key
+        if fallback is not None and sorted_entries >= MIN_SORTED_ENTRIES and name_key > key:
+            break
+
+    return fallback, False
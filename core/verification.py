@@ -0,0 +1,89 @@
+"""
+Verification of downloaded ROMs against RetroAchievements hashes
+"""
+
+import os
+from typing import Dict, Iterable, Optional, Set
+
+from utils.hashing import StreamHasher, ZipStreamHasher
+
+VERIFIED = 'verified'
+MISMATCHED = 'mismatched'
+UNVERIFIABLE = 'unverifiable'
+
+# Consoles whose RetroAchievements hash is the MD5 of the ROM data.
+# Disc based systems, the DS, N64 byte orders and arcade sets use
+# custom hashing and can't be checked from a plain MD5. Atari Jaguar
+# is left out because its source serves Jaguar CD disc images.
+PLAIN_MD5_CONSOLES = {
+    "Game Boy", "Game Boy Color", "Game Boy Advance",
+    "NES/Famicom", "SNES/Super Famicom",
+    "Atari 2600", "Atari 7800",
+    "Master System", "Game Gear", "Genesis/Mega Drive", "32X",
+    "PC Engine/TurboGrafx-16", "Neo Geo Pocket"
+}
+
+# Archives that can't be hashed member by member while streaming
+UNHASHABLE_ARCHIVES = ('.7z', '.rar')
+
+# Disc images, whose RetroAchievements hash never equals the file's MD5.
+# A lone .bin is left out as cartridge dumps (Atari 2600, Genesis) use it too.
+DISC_IMAGE_EXTENSIONS = ('.chd', '.iso', '.cue', '.img', '.cdi', '.gdi')
+
+
+def get_header_size(console: str, head: bytes) -> int:
+    """Get the size of the header RetroAchievements ignores when hashing a ROM"""
+    if console == "NES/Famicom" and head[:4] in (b'NES\x1a', b'FDS\x1a'):
+        return 16
+    if console == "Atari 7800" and head[1:10] == b'ATARI7800':
+        return 128
+    if console in ("SNES/Super Famicom", "PC Engine/TurboGrafx-16"):
+        # Copier headers are detected by file size, which isn't known yet,
+        # so both the full and the headerless MD5 are kept
+        return 512
+    return 0
+
+
+def create_hasher(console: str, filename: str):
+    """Create the hasher for a download, or None if it can't be hashed while streaming"""
+    if console not in PLAIN_MD5_CONSOLES:
+        return None  # verify() can't use the digests, so don't spend CPU on them
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in UNHASHABLE_ARCHIVES or extension in DISC_IMAGE_EXTENSIONS:
+        return None
+
+    def rom_hasher(name=None):
+        return StreamHasher(lambda head: get_header_size(console, head))
+
+    if extension == '.zip':
+        return ZipStreamHasher(rom_hasher)
+    return rom_hasher()
+
+
+def get_expected_md5s(hash_results: Iterable[Dict]) -> Set[str]:
+    """Get the MD5s from a RetroAchievements game hashes result list"""
+    return {result['MD5'].lower() for result in hash_results if result.get('MD5')}
+
+
+def verify(console: str, hasher, expected_md5s: Optional[Set[str]]) -> str:
+    """Compare a finished download's hashes with the MD5s RetroAchievements accepts"""
+    if hasher is None or not expected_md5s or console not in PLAIN_MD5_CONSOLES:
+        return UNVERIFIABLE
+
+    if hasher.get_md5s() & expected_md5s:
+        return VERIFIED
+    if isinstance(hasher, ZipStreamHasher) and not hasher.complete:
+        # An unhashed member might have been the one that matches
+        return UNVERIFIABLE
+    return MISMATCHED
+
+
+def get_digests(hasher) -> Dict:
+    """Get the digests of a hasher's file, or of each member of an archive"""
+    if hasher is None:
+        return {}
+    if isinstance(hasher, ZipStreamHasher):
+        return {
+            'members': {name: member.digests() for name, member in hasher.members if member is not None}
+        }
+    return hasher.digests()
@@ -1,11 +1,12 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QSpinBox, QProgressBar, QGroupBox, QCheckBox, QTextEdit,
-    QScrollArea, QGridLayout
+    QSpinBox, QProgressBar, QGroupBox, QCheckBox, QPlainTextEdit,
+    QScrollArea, QGridLayout, QTableWidget, QTableWidgetItem, QHeaderView
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QTextCursor
+from PyQt5.QtGui import QFont
 
+from core.config import config
 from core.rom_sources import ROM_SOURCES
 from gui.styles import get_button_style, get_stop_button_style, get_clear_button_style
 
@@ -15,7 +16,7 @@ class MainTab(QWidget):
         super().__init__()
         self.parent = parent
         self.console_checkboxes = {}
-        self.current_download_progress = {}
+        self.download_rows = {}  # filename -> row in downloads_table
         self.setup_ui()
 
     def setup_ui(self):
@@ -101,9 +102,21 @@ class MainTab(QWidget):
         self.progress_bar.setVisible(False)
         progress_layout.addWidget(self.progress_bar)
 
-        self.status_text = QTextEdit()
+        # Active downloads are updated in place rather than rewritten into the log
+        self.downloads_table = QTableWidget(0, 3)
+        self.downloads_table.setHorizontalHeaderLabels(["File", "Progress", "Size"])
+        self.downloads_table.verticalHeader().setVisible(False)
+        self.downloads_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.downloads_table.setSelectionMode(QTableWidget.NoSelection)
+        self.downloads_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.downloads_table.setMaximumHeight(150)
+        progress_layout.addWidget(self.downloads_table)
+
+        # The document drops its oldest lines once the retention limit is hit
+        self.status_text = QPlainTextEdit()
         self.status_text.setMaximumHeight(200)
         self.status_text.setReadOnly(True)
+        self.status_text.setMaximumBlockCount(config.log_retention_lines)
         self.status_text.setStyleSheet("background-color: #f8f9fa; font-family: 'Courier New';")
         progress_layout.addWidget(self.status_text)
 
@@ -169,13 +182,16 @@ class MainTab(QWidget):
         self.stop_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
-        self.status_text.clear()
-        self.current_download_progress.clear()
+        self.clear_log()
 
     def on_collection_finished(self):
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.progress_bar.setVisible(False)
+        self.clear_download_rows()
+
+    def on_collection_stopping(self):
+        self.stop_btn.setEnabled(False)
 
     def on_collection_stopped(self):
         self.on_collection_finished()
@@ -187,46 +203,50 @@ class MainTab(QWidget):
         self.progress_bar.setValue(value)
 
     def update_status(self, message):
-        if message.startswith("✅ Downloaded:") or message.startswith("⚠️ Skipped"):
-            filename = message.split(": ", 1)[1] if ": " in message else ""
-            if filename in self.current_download_progress:
-                del self.current_download_progress[filename]
+        self.status_text.appendPlainText(message)
+        scrollbar = self.status_text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
 
-        self.status_text.append(message)
-        cursor = self.status_text.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.status_text.setTextCursor(cursor)
+    def on_download_finished(self, filename, status):
+        self.remove_download_row(filename)
 
     def update_download_progress(self, filename, current, total):
-        if total > 0:
-            percent = (current / total) * 100
-            filled = int(percent / 2)
-            bar = "█" * filled + "░" * (50 - filled)
-            current_mb = current / (1024 * 1024)
-            total_mb = total / (1024 * 1024)
-            progress_line = f"📥 {filename[:30]:<30} |{bar}| {percent:5.1f}% ({current_mb:.1f}/{total_mb:.1f} MB)"
-            self.current_download_progress[filename] = progress_line
-
-            text = self.status_text.toPlainText()
-            lines = text.split('\n')
-            found_index = -1
-            for i, line in enumerate(lines):
-                if filename[:30] in line and '|' in line:
-                    found_index = i
-                    break
-
-            if found_index >= 0:
-                lines[found_index] = progress_line
-            else:
-                lines.append(progress_line)
-
-            self.status_text.clear()
-            self.status_text.append('\n'.join(lines))
-
-            cursor = self.status_text.textCursor()
-            cursor.movePosition(QTextCursor.End)
-            self.status_text.setTextCursor(cursor)
+        if total <= 0:
+            return
+
+        row = self.download_rows.get(filename)
+        if row is None:
+            row = self.add_download_row(filename)
+
+        self.downloads_table.cellWidget(row, 1).setValue(int(current * 100 / total))
+        current_mb = current / (1024 * 1024)
+        total_mb = total / (1024 * 1024)
+        self.downloads_table.item(row, 2).setText(f"{current_mb:.1f}/{total_mb:.1f} MB")
+
+    def add_download_row(self, filename):
+        row = self.downloads_table.rowCount()
+        self.downloads_table.insertRow(row)
+        self.downloads_table.setItem(row, 0, QTableWidgetItem(f"📥 {filename}"))
+        bar = QProgressBar()
+        bar.setRange(0, 100)
+        self.downloads_table.setCellWidget(row, 1, bar)
+        self.downloads_table.setItem(row, 2, QTableWidgetItem(""))
+        self.download_rows[filename] = row
+        return row
+
+    def remove_download_row(self, filename):
+        row = self.download_rows.pop(filename, None)
+        if row is None:
+            return
+        self.downloads_table.removeRow(row)
+        for name, other in self.download_rows.items():
+            if other > row:
+                self.download_rows[name] = other - 1
+
+    def clear_download_rows(self):
+        self.download_rows.clear()
+        self.downloads_table.setRowCount(0)
 
     def clear_log(self):
         self.status_text.clear()
-        self.current_download_progress.clear()
+        self.clear_download_rows()
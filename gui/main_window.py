@@ -7,9 +7,7 @@ from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer
 
 from gui.main_tab import MainTab
-from gui.settings_tab import SettingsTab
-from gui.rom_search.rom_search_tab import ROMSearchTab
-from core.config import Config
+from core.config import config
 
 
 class ROMCollectorGUI(QMainWindow):
@@ -18,8 +16,8 @@ class ROMCollectorGUI(QMainWindow):
         self.setWindowTitle("RetroAchievements Game Collector v1.1.9-Beta")
         self.setGeometry(100, 100, 900, 700)
 
-        # Initialize configuration
-        self.config = Config()
+        # Share the global configuration instead of loading it again
+        self.config = config
 
         # Initialize variables
         self.worker = None
@@ -34,30 +32,61 @@ class ROMCollectorGUI(QMainWindow):
         self.setCentralWidget(central_widget)
 
         # Create tab widget
-        tab_widget = QTabWidget()
+        self.tab_widget = QTabWidget()
 
-        # Create tabs
+        # Create tabs; only the first is built up front, the rest on first use
         self.main_tab = MainTab(self)
-        self.rom_search_tab = ROMSearchTab(self)
-        self.settings_tab = SettingsTab(self)
+        self.rom_search_tab = None
+        self.settings_tab = None
+        self.lazy_tabs = {
+            1: self.create_rom_search_tab,
+            2: self.create_settings_tab
+        }
 
         # Add tabs
-        tab_widget.addTab(self.main_tab, "Most Recent Sets")
-        tab_widget.addTab(self.rom_search_tab, "ROM Search")
-        tab_widget.addTab(self.settings_tab, "Settings")
+        self.tab_widget.addTab(self.main_tab, "Most Recent Sets")
+        self.tab_widget.addTab(self.create_tab_placeholder(), "ROM Search")
+        self.tab_widget.addTab(self.create_tab_placeholder(), "Settings")
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
 
         # Layout
         main_layout = QVBoxLayout(central_widget)
-        main_layout.addWidget(tab_widget)
+        main_layout.addWidget(self.tab_widget)
+
+    def create_tab_placeholder(self):
+        """Create an empty container that a lazily built tab is added to"""
+        placeholder = QWidget()
+        layout = QVBoxLayout(placeholder)
+        layout.setContentsMargins(0, 0, 0, 0)
+        return placeholder
+
+    def on_tab_changed(self, index):
+        """Build a deferred tab the first time it is shown"""
+        factory = self.lazy_tabs.pop(index, None)
+        if factory is not None:
+            self.tab_widget.widget(index).layout().addWidget(factory())
+
+    def create_rom_search_tab(self):
+        from gui.rom_search.rom_search_tab import ROMSearchTab
+        self.rom_search_tab = ROMSearchTab(self)
+        return self.rom_search_tab
+
+    def create_settings_tab(self):
+        from gui.settings_tab import SettingsTab
+        self.settings_tab = SettingsTab(self)
+        self.settings_tab.load_settings()
+        return self.settings_tab
 
     def load_settings(self):
         """Load settings from configuration"""
-        self.settings_tab.load_settings()
+        if self.settings_tab:
+            self.settings_tab.load_settings()
         self.main_tab.load_settings()
 
     def save_settings(self):
         """Save current settings to configuration"""
-        self.settings_tab.save_settings()
+        if self.settings_tab:
+            self.settings_tab.save_settings()
         self.main_tab.save_settings()
 
     # 🔧 API Key access
@@ -96,21 +125,39 @@ class ROMCollectorGUI(QMainWindow):
         self.worker.progress_update.connect(self.main_tab.update_status)
         self.worker.progress_percent.connect(self.main_tab.update_progress_bar)
         self.worker.download_progress.connect(self.main_tab.update_download_progress)
+        self.worker.download_finished.connect(self.main_tab.on_download_finished)
         self.worker.finished.connect(self.on_collection_finished)
         self.worker.error.connect(self.on_collection_error)
+        self.worker.cancelled.connect(self.on_collection_cancelled)
 
         self.worker.start()
         return True
 
     def stop_collection(self):
-        """Stop the ROM collection process"""
+        """Ask the ROM collection process to stop without blocking the GUI"""
         if self.worker and self.worker.isRunning():
-            self.worker.terminate()
-            self.worker.wait()
+            # Transfers are aborted and partial files kept; cancelled follows shortly
+            self.worker.stop()
+            self.main_tab.on_collection_stopping()
+            self.main_tab.update_status("⏹️ Stopping...")
+            return
+
+        self.on_collection_cancelled()
 
+    def on_collection_cancelled(self):
+        """Handle the collection having stopped after a stop request"""
         self.main_tab.on_collection_stopped()
         self.main_tab.update_status("❌ Collection stopped by user")
 
+    def closeEvent(self, event):
+        """Stop the collection and ROM Search downloads so the application exits promptly"""
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+        if self.rom_search_tab is not None:
+            self.rom_search_tab.shutdown()
+        super().closeEvent(event)
+
     def on_collection_finished(self, message):
         """Handle collection completion"""
         self.main_tab.on_collection_finished()
@@ -0,0 +1,184 @@
+import os
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from core.config import config
+from core.http_transport import http_session
+from core.mirror_health import mirror_health
+from utils.cancellation import CancellationToken, Cancelled
+from utils.progress import ProgressThrottle
+from utils.segmented_download import download_with_mirrors
+
+# Queue item states
+QUEUED = "Queued"
+DOWNLOADING = "Downloading"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+
+def download_rom(rom_data, on_progress, cancelled=None):
+    """
+    Download a ROM from its best source, failing over between the others
+
+    Returns:
+        A note for the finished item, e.g. when the file was already there
+    """
+    filename = f"{rom_data['name']}{rom_data['extension']}"
+
+    console = rom_data.get("console") or "UnknownConsole"
+    base_path = rom_data.get("download_path", "downloads")
+    downloads_dir = os.path.join(base_path, "Games", console)
+    os.makedirs(downloads_dir, exist_ok=True)
+
+    filepath = os.path.join(downloads_dir, filename)
+    if os.path.exists(filepath):
+        return "Already exists"
+
+    urls = mirror_health.rank([source['full_url'] for source in rom_data.get('sources', [])])
+    if not urls:
+        raise Exception("No download sources available")
+
+    transfer = download_with_mirrors(
+        urls, filepath, config.download_chunk_size,
+        config.segmented_download_threshold, config.segmented_download_segments,
+        session=http_session, health=mirror_health,
+        stall_timeout=config.mirror_stall_timeout, cancel=cancelled
+    )
+    throttle = ProgressThrottle(on_progress, config.progress_update_hz)
+    try:
+        for downloaded, total_size in transfer:
+            if cancelled is not None and cancelled.is_set():
+                # Closing the transfer keeps the .part file for a later resume
+                raise Cancelled()
+            if total_size > 0:
+                throttle.update(filename, downloaded, total_size)
+    finally:
+        transfer.close()
+    throttle.flush()
+    return ""
+
+
+class DownloadSignals(QObject):
+    # Signals carry the task so results of a superseded attempt can be ignored
+    progress = pyqtSignal(object, int)
+    finished = pyqtSignal(object, str, str)
+
+
+class ROMDownloadTask(QRunnable):
+    """One queued ROM download, run on the queue's thread pool"""
+
+    def __init__(self, item_id, rom_data, signals):
+        super().__init__()
+        # The queue keeps the Python reference; Qt must not delete it after run()
+        self.setAutoDelete(False)
+        self.item_id = item_id
+        self.rom_data = rom_data
+        self.signals = signals
+        # Cancelling also aborts the transfer's open connections
+        self.cancelled = CancellationToken()
+
+    def run(self):
+        if self.cancelled.is_set():
+            self.signals.finished.emit(self, CANCELLED, "")
+            return
+
+        self.signals.progress.emit(self, 0)
+        try:
+            message = download_rom(self.rom_data, self.emit_progress, self.cancelled)
+            self.signals.finished.emit(self, DONE, message)
+        except Cancelled:
+            self.signals.finished.emit(self, CANCELLED, "")
+        except Exception as e:
+            self.signals.finished.emit(self, FAILED, str(e))
+
+    def emit_progress(self, filename, downloaded, total_size):
+        self.signals.progress.emit(self, int((downloaded / total_size) * 100))
+
+
+class DownloadQueue(QObject):
+    """Serves queued ROM downloads from a bounded, reused pool of worker threads"""
+
+    item_added = pyqtSignal(int, str)
+    item_changed = pyqtSignal(int, str, str)
+    item_progress = pyqtSignal(int, int)
+
+    def __init__(self, max_workers, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, max_workers))
+        self.signals = DownloadSignals(self)
+        self.signals.progress.connect(self.on_progress)
+        self.signals.finished.connect(self.on_finished)
+        self.items = {}
+        self.next_id = 0
+
+    def enqueue(self, rom_data):
+        """Queue a ROM for download and return its item ID"""
+        item_id = self.next_id
+        self.next_id += 1
+        self.items[item_id] = {'rom_data': rom_data, 'status': QUEUED, 'task': None}
+        self.item_added.emit(item_id, f"{rom_data['name']}{rom_data['extension']}")
+        self.start(item_id)
+        return item_id
+
+    def start(self, item_id):
+        item = self.items[item_id]
+        item['task'] = ROMDownloadTask(item_id, item['rom_data'], self.signals)
+        item['status'] = QUEUED
+        self.item_changed.emit(item_id, QUEUED, "")
+        self.pool.start(item['task'])
+
+    def retry(self, item_id):
+        """Queue a failed or cancelled item again, resuming any partial file"""
+        item = self.items.get(item_id)
+        if item and item['status'] in (FAILED, CANCELLED):
+            self.start(item_id)
+
+    def cancel(self, item_id):
+        """Cancel an item, removing it from the queue if it hasn't started"""
+        item = self.items.get(item_id)
+        if not item or item['status'] not in (QUEUED, DOWNLOADING):
+            return
+        task = item['task']
+        task.cancelled.set()
+        if self.pool.tryTake(task):
+            self.on_finished(task, CANCELLED, "")
+
+    def cancel_all(self):
+        for item_id in list(self.items):
+            self.cancel(item_id)
+
+    def remove_finished(self):
+        """Forget finished items and return their IDs"""
+        removed = [item_id for item_id, item in self.items.items() if item['status'] == DONE]
+        for item_id in removed:
+            del self.items[item_id]
+        return removed
+
+    def get_counts(self):
+        counts = {}
+        for item in self.items.values():
+            counts[item['status']] = counts.get(item['status'], 0) + 1
+        return counts
+
+    def on_progress(self, task, percent):
+        item = self.items.get(task.item_id)
+        if item is None or item['task'] is not task:
+            return
+        if item['status'] == QUEUED:
+            item['status'] = DOWNLOADING
+            self.item_changed.emit(task.item_id, DOWNLOADING, "")
+        self.item_progress.emit(task.item_id, percent)
+
+    def on_finished(self, task, status, message):
+        item = self.items.get(task.item_id)
+        if item is None or item['task'] is not task:
+            return
+        item['status'] = status
+        self.item_changed.emit(task.item_id, status, message)
+
+    def wait(self, msecs=-1):
+        """Cancel everything and wait for running downloads to stop"""
+        self.cancel_all()
+        return self.pool.waitForDone(msecs)
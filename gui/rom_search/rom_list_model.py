@@ -0,0 +1,43 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+
+class ROMListModel(QAbstractListModel):
+    """Read-only list model over a sequence of ROMs
+
+    The view only asks for the rows it is painting, so nothing is built
+    per ROM up front, and filtering just swaps the sequence being shown.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._roms = []
+
+    def set_roms(self, roms):
+        """Show a new sequence of ROMs (kept by reference, not copied)"""
+        self.beginResetModel()
+        self._roms = roms
+        self.endResetModel()
+
+    def rom_at(self, row):
+        """Get the ROM shown at a row, or None if out of range"""
+        if 0 <= row < len(self._roms):
+            return self._roms[row]
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._roms)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        rom = self.rom_at(index.row())
+        if rom is None:
+            return None
+        if role == Qt.DisplayRole:
+            return f"{rom['name']} ({rom['extension']})"
+        if role == Qt.UserRole:
+            return rom
+        return None
@@ -1,39 +1,65 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 import asyncio
 import aiohttp
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, unquote
-import os
 
+from core.listing_cache import listing_cache
+from core.listing_parser import parse_listing
 from core.rom_sources import get_console_sources
+from core.rom_store import ROMStore
+from core.search_index import TrigramIndex
+from utils.cancellation import CancellationToken
+from utils.profiling import profiler
 
 
 class AsyncROMLoaderThread(QThread):
-    roms_loaded = pyqtSignal(str, list)
+    roms_loaded = pyqtSignal(str, object, object)  # console, ROMStore, search index
     progress_update = pyqtSignal(str)
     error_occurred = pyqtSignal(str, str)
 
     def __init__(self, console_name):
         super().__init__()
         self.console_name = console_name
+        self.cancel_token = CancellationToken()
+
+    def stop(self):
+        """Cancel the load from any thread; nothing is emitted once stopped"""
+        self.cancel_token.cancel()
 
     def run(self):
+        with profiler.section(f"rom_loader-{self.console_name}"):
+            self.load()
+
+    def load(self):
+        loop = asyncio.new_event_loop()
+        unregister = lambda: None
         try:
-            loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-            roms = loop.run_until_complete(self.fetch_roms_async())
-            self.roms_loaded.emit(self.console_name, roms)
+            task = loop.create_task(self.fetch_roms_async())
+            # Cancelling the task closes its open connections straight away
+            unregister = self.cancel_token.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+            roms = loop.run_until_complete(task)
+            if self.cancel_token.is_cancelled():
+                return
+            # Built here so the GUI thread never pays for indexing
+            index = TrigramIndex(roms)
+            if not self.cancel_token.is_cancelled():
+                self.roms_loaded.emit(self.console_name, roms, index)
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
-            self.error_occurred.emit(self.console_name, str(e))
+            if not self.cancel_token.is_cancelled():
+                self.error_occurred.emit(self.console_name, str(e))
         finally:
+            unregister()
             loop.close()
 
     async def fetch_roms_async(self):
+        store = ROMStore()
         sources = get_console_sources(self.console_name)
         if not sources:
-            return []
+            store.finish()
+            return store
 
-        all_roms = []
         timeout = aiohttp.ClientTimeout(total=30)
         async with aiohttp.ClientSession(timeout=timeout) as session:
             tasks = [self.fetch_from_source(session, src) for src in sources]
@@ -43,66 +69,32 @@ class AsyncROMLoaderThread(QThread):
                 if isinstance(result, Exception):
                     self.progress_update.emit(f"Source {i+1} failed: {result}")
                     continue
-                for rom in result:
-                    rom['sources'] = rom.get('sources', []) + [{
-                        'base_url': sources[i],
-                        'full_url': rom['url']
-                    }]
-                all_roms.extend(result)
-                self.progress_update.emit(f"Loaded {len(result)} from source {i+1}")
+                # ROMs listed by several sources are merged by name
+                added = store.add_entries(sources[i], result)
+                # The store replaces the parsed entries, so don't keep both in memory
+                listing_cache.forget(sources[i])
+                self.progress_update.emit(f"Loaded {added} from source {i+1}")
 
-        # Deduplicate
-        unique = {}
-        for rom in all_roms:
-            name = rom['name']
-            if name not in unique:
-                unique[name] = rom
-            else:
-                unique[name]['sources'].extend(rom['sources'])
-        return list(unique.values())
+        store.finish()
+        return store
 
     async def fetch_from_source(self, session, url):
         try:
-            async with session.get(url) as resp:
+            record = listing_cache.get(url)
+            if record and listing_cache.is_fresh(record):
+                return record['entries']
+
+            headers = listing_cache.get_validators(record)
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 304 and record:
+                    listing_cache.mark_revalidated(url, record)
+                    return record['entries']
                 if resp.status != 200:
                     raise Exception(f"HTTP {resp.status}")
                 html = await resp.text()
-                return self.parse_html(html, url)
+
+            entries = parse_listing(html, url)
+            listing_cache.put(url, entries, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+            return entries
         except Exception as e:
             raise Exception(f"Fetch failed from {url}: {e}")
-
-    def parse_html(self, html, base_url):
-        soup = BeautifulSoup(html, 'html.parser')
-        roms = []
-
-        # ✅ Detect archive.org and extract collection folder correctly
-        is_archive = "archive.org" in base_url
-        archive_collection = ""
-        if is_archive:
-            # Ensure we preserve everything after "/download/"
-            # E.g., https://archive.org/download/nointro.atari-2600 => nointro.atari-2600
-            archive_collection = base_url.split("/download/")[-1].strip("/")
-
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href in ['../', '/'] or href.endswith('/'):
-                continue
-
-            filename = unquote(href)
-            name, ext = os.path.splitext(filename)
-            if not ext:
-                continue
-
-            # ✅ Ensure archive.org link includes collection path
-            if is_archive:
-                full_url = f"https://archive.org/download/{archive_collection}/{filename}"
-            else:
-                full_url = urljoin(base_url, href)
-
-            roms.append({
-                'name': name,
-                'extension': ext,
-                'url': full_url
-            })
-
-        return roms
@@ -1,10 +1,12 @@
 import re
 from PyQt5.QtCore import QTimer, Qt, QThread
-from PyQt5.QtWidgets import QListWidgetItem, QMessageBox
+from PyQt5.QtWidgets import QListWidgetItem, QMessageBox, QProgressBar, QTableWidgetItem
+
+from core.config import config
 
-from .rom_loader_thread import AsyncROMLoaderThread
-from .download_thread import ROMDownloadThread
 from core.rom_sources import get_supported_consoles
+from core.search_index import filter_roms
+from utils.profiling import profiler
 
 
 def setup_connections(self):
@@ -12,8 +14,12 @@ def setup_connections(self):
     self.search_input.textChanged.connect(self.on_search_changed)
     self.case_sensitive_cb.toggled.connect(self.on_search_changed)
     self.whole_word_cb.toggled.connect(self.on_search_changed)
-    self.rom_list.itemSelectionChanged.connect(self.on_rom_selected)
+    self.rom_list.selectionModel().currentChanged.connect(lambda current, previous: self.on_rom_selected())
     self.download_btn.clicked.connect(self.download_selected_rom)
+    self.retry_download_btn.clicked.connect(lambda: retry_downloads(self))
+    self.cancel_download_btn.clicked.connect(lambda: cancel_downloads(self))
+    self.cancel_all_downloads_btn.clicked.connect(lambda: cancel_all_downloads(self))
+    self.clear_finished_btn.clicked.connect(lambda: clear_finished_downloads(self))
     self.refresh_consoles_btn.clicked.connect(lambda: populate_consoles(self))
 
     self.search_timer = QTimer()
@@ -43,8 +49,10 @@ def on_console_changed(self):
     self.status_label.setText(f"Loading ROMs for {console}...")
 
     if self.rom_loader_thread and self.rom_loader_thread.isRunning():
-        self.rom_loader_thread.terminate()
-        self.rom_loader_thread.wait()
+        retire_loader_thread(self, self.rom_loader_thread)
+
+    # Deferred so aiohttp and the listing cache load on first use
+    from .rom_loader_thread import AsyncROMLoaderThread
 
     self.rom_loader_thread = AsyncROMLoaderThread(console)
     self.rom_loader_thread.roms_loaded.connect(self.on_roms_loaded)
@@ -53,9 +61,21 @@ def on_console_changed(self):
     self.rom_loader_thread.start()
 
 
-def on_roms_loaded(self, console_name, roms):
+def retire_loader_thread(self, thread):
+    """Stop a superseded loader without blocking the GUI thread"""
+    thread.roms_loaded.disconnect()
+    thread.progress_update.disconnect()
+    thread.error_occurred.disconnect()
+    thread.stop()
+    # Owned by the tab until it has wound down, then freed
+    thread.setParent(self)
+    thread.finished.connect(thread.deleteLater)
+
+
+def on_roms_loaded(self, console_name, roms, index=None):
     self.rom_data[console_name] = roms
-    self.filtered_roms = roms.copy()
+    self.search_indexes[console_name] = index
+    self.filtered_roms = roms
     update_rom_list(self)
     self.load_progress.setVisible(False)
     self.status_label.setText(f"Loaded {len(roms)} ROMs for {console_name}")
@@ -77,6 +97,11 @@ def on_search_changed(self):
 
 
 def perform_search(self):
+    with profiler.section("search"):
+        run_search(self)
+
+
+def run_search(self):
     search_text = self.search_input.text().strip()
     console_name = self.console_combo.currentData()
 
@@ -86,32 +111,26 @@ def perform_search(self):
     all_roms = self.rom_data[console_name]
 
     if not search_text:
-        self.filtered_roms = all_roms.copy()
+        self.filtered_roms = all_roms
     else:
         try:
-            pattern = search_text
-            if self.whole_word_cb.isChecked():
-                pattern = r'\b' + pattern + r'\b'
-            flags = 0 if self.case_sensitive_cb.isChecked() else re.IGNORECASE
-            regex = re.compile(pattern, flags)
-
-            self.filtered_roms = [
-                rom for rom in all_roms
-                if regex.search(rom['name']) or regex.search(rom.get('extension', ''))
-            ]
+            self.filtered_roms = filter_roms(
+                all_roms,
+                search_text,
+                self.case_sensitive_cb.isChecked(),
+                self.whole_word_cb.isChecked(),
+                self.search_indexes.get(console_name)
+            )
         except re.error:
-            self.filtered_roms = all_roms.copy()
+            self.filtered_roms = all_roms
 
     update_rom_list(self)
 
 
 def update_rom_list(self):
-    self.rom_list.clear()
-    for rom in self.filtered_roms:
-        label = f"{rom['name']} ({rom['extension']})"
-        item = QListWidgetItem(label)
-        item.setData(Qt.UserRole, rom)
-        self.rom_list.addItem(item)
+    # A model reset drops the current row without emitting currentChanged
+    self.rom_model.set_roms(self.filtered_roms)
+    on_rom_selected(self)
 
     total = len(self.rom_data.get(self.console_combo.currentData(), []))
     shown = len(self.filtered_roms)
@@ -119,19 +138,26 @@ def update_rom_list(self):
 
 
 def clear_rom_list(self):
-    self.rom_list.clear()
     self.filtered_roms = []
+    self.rom_model.set_roms(self.filtered_roms)
     self.rom_count_label.setText("No ROMs loaded")
     clear_rom_details(self)
 
 
+def get_current_rom(self):
+    index = self.rom_list.currentIndex()
+    if not index.isValid():
+        return None
+    return self.rom_model.rom_at(index.row())
+
+
 def on_rom_selected(self):
-    item = self.rom_list.currentItem()
-    if not item:
+    rom = get_current_rom(self)
+    if rom is None:
         clear_rom_details(self)
         return
 
-    show_rom_details(self, item.data(Qt.UserRole))
+    show_rom_details(self, rom)
 
 
 def show_rom_details(self, rom_data):
@@ -158,36 +184,145 @@ def clear_rom_details(self):
     self.download_btn.setEnabled(False)
 
 
+def get_download_queue(self):
+    if self.download_queue is None:
+        # Deferred so the download stack loads on first use
+        from .download_queue import DownloadQueue
+
+        self.download_queue = DownloadQueue(config.rom_search_download_workers, self)
+        self.download_queue.item_added.connect(lambda item_id, name: on_queue_item_added(self, item_id, name))
+        self.download_queue.item_changed.connect(
+            lambda item_id, status, message: on_queue_item_changed(self, item_id, status, message))
+        self.download_queue.item_progress.connect(
+            lambda item_id, percent: on_queue_item_progress(self, item_id, percent))
+    return self.download_queue
+
+
+def get_selected_roms(self):
+    rows = sorted(index.row() for index in self.rom_list.selectionModel().selectedRows())
+    roms = [self.rom_model.rom_at(row) for row in rows]
+    roms = [rom for rom in roms if rom is not None]
+    if not roms:
+        rom = get_current_rom(self)
+        roms = [rom] if rom is not None else []
+    return roms
+
+
 def download_selected_rom(self):
-    item = self.rom_list.currentItem()
-    if not item:
+    roms = get_selected_roms(self)
+    if not roms:
         return
 
-    rom_data = item.data(Qt.UserRole)
+    console = self.console_combo.currentData()
+    download_path = self.parent.get_download_path()
+    queue = get_download_queue(self)
+    for rom in roms:
+        queue.enqueue(dict(rom, console=console, download_path=download_path))
+
+    self.status_label.setText(f"Queued {len(roms)} ROM(s) for download")
+
+
+def on_queue_item_added(self, item_id, name):
+    row = self.queue_table.rowCount()
+    self.queue_table.insertRow(row)
+    name_item = QTableWidgetItem(name)
+    name_item.setData(Qt.UserRole, item_id)
+    self.queue_table.setItem(row, 0, name_item)
+    self.queue_table.setItem(row, 1, QTableWidgetItem(""))
+    bar = QProgressBar()
+    bar.setRange(0, 100)
+    self.queue_table.setCellWidget(row, 2, bar)
+    self.queue_rows[item_id] = row
+
+
+def on_queue_item_changed(self, item_id, status, message):
+    row = self.queue_rows.get(item_id)
+    if row is None:
+        return
 
-    rom_data['console'] = self.console_combo.currentData()
-    rom_data['download_path'] = self.parent.get_download_path()
+    from .download_queue import DONE, QUEUED
 
-    self.download_btn.setEnabled(False)
-    self.download_progress.setVisible(True)
-    self.download_progress.setRange(0, 100)
-
-    if rom_data.get('sources'):
-        source = rom_data['sources'][0]
-        self.download_thread = ROMDownloadThread(rom_data, source)
-        self.download_thread.progress.connect(self.download_progress.setValue)
-        self.download_thread.finished.connect(self.on_download_finished)
-        self.download_thread.start()
-    else:
-        self.on_download_finished(False, "No download sources available")
+    status_item = self.queue_table.item(row, 1)
+    status_item.setText(status)
+    status_item.setToolTip(message)
+    bar = self.queue_table.cellWidget(row, 2)
+    if status == DONE:
+        bar.setValue(100)
+    elif status == QUEUED:
+        bar.setValue(0)  # A retry starts over, even when it resumes a partial file
+    update_queue_progress(self)
 
 
-def on_download_finished(self, success, message):
-    self.download_btn.setEnabled(True)
-    self.download_progress.setVisible(False)
-    if success:
-        self.selected_rom_label.setText(f"Downloaded: {message}")
-        QMessageBox.information(self, "Download Complete", f"Successfully downloaded: {message}")
-    else:
-        self.selected_rom_label.setText(f"Error: {message}")
-        QMessageBox.warning(self, "Download Error", f"Download failed: {message}")
+def on_queue_item_progress(self, item_id, percent):
+    row = self.queue_rows.get(item_id)
+    if row is not None:
+        self.queue_table.cellWidget(row, 2).setValue(percent)
+
+
+def update_queue_progress(self):
+    from .download_queue import DONE, FAILED, CANCELLED
+
+    counts = self.download_queue.get_counts()
+    total = sum(counts.values())
+    finished = counts.get(DONE, 0) + counts.get(FAILED, 0) + counts.get(CANCELLED, 0)
+    self.download_progress.setRange(0, max(1, total))
+    self.download_progress.setValue(finished)
+
+    if total and finished == total:
+        self.status_label.setText(
+            f"Downloads finished: {counts.get(DONE, 0)} done, "
+            f"{counts.get(FAILED, 0)} failed, {counts.get(CANCELLED, 0)} cancelled"
+        )
+
+
+def get_selected_queue_items(self):
+    rows = {index.row() for index in self.queue_table.selectionModel().selectedRows()}
+    return [self.queue_table.item(row, 0).data(Qt.UserRole) for row in sorted(rows)]
+
+
+def retry_downloads(self):
+    if self.download_queue is None:
+        return
+    # Without a selection every failed or cancelled item is retried
+    item_ids = get_selected_queue_items(self) or list(self.download_queue.items)
+    for item_id in item_ids:
+        self.download_queue.retry(item_id)
+
+
+def cancel_downloads(self):
+    if self.download_queue is None:
+        return
+    for item_id in get_selected_queue_items(self):
+        self.download_queue.cancel(item_id)
+
+
+def cancel_all_downloads(self):
+    if self.download_queue is not None:
+        self.download_queue.cancel_all()
+
+
+def shutdown(self):
+    """Cancel downloads and loads and wait for their threads, for when the window closes"""
+    if self.download_queue is not None:
+        self.download_queue.wait()
+    if self.rom_loader_thread is not None and self.rom_loader_thread.isRunning():
+        self.rom_loader_thread.stop()
+    # Includes superseded loaders still winding down
+    for thread in self.findChildren(QThread) + [self.rom_loader_thread]:
+        if thread is not None:
+            thread.wait()
+
+
+def clear_finished_downloads(self):
+    if self.download_queue is None:
+        return
+    removed = set(self.download_queue.remove_finished())
+    for row in reversed(range(self.queue_table.rowCount())):
+        if self.queue_table.item(row, 0).data(Qt.UserRole) in removed:
+            self.queue_table.removeRow(row)
+
+    self.queue_rows = {
+        self.queue_table.item(row, 0).data(Qt.UserRole): row
+        for row in range(self.queue_table.rowCount())
+    }
+    update_queue_progress(self)
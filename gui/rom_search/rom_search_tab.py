@@ -22,7 +22,7 @@ from .rom_logic import (
     show_rom_details,
     clear_rom_details,
     download_selected_rom,
-    on_download_finished
+    shutdown
 )
 
 
@@ -31,9 +31,11 @@ class ROMSearchTab(QWidget):
         super().__init__()
         self.parent = parent
         self.rom_data = {}
+        self.search_indexes = {}
         self.filtered_roms = []
         self.search_thread = None
-        self.download_thread = None
+        self.download_queue = None
+        self.queue_rows = {}  # queue item ID -> row in queue_table
         self.rom_loader_thread = None
 
         self.setup_ui()
@@ -50,7 +52,7 @@ class ROMSearchTab(QWidget):
 
     # Hook external logic methods back in
     def on_console_changed(self): on_console_changed(self)
-    def on_roms_loaded(self, name, roms): on_roms_loaded(self, name, roms)
+    def on_roms_loaded(self, name, roms, index=None): on_roms_loaded(self, name, roms, index)
     def on_loading_progress(self, msg): on_loading_progress(self, msg)
     def on_loading_error(self, name, err): on_loading_error(self, name, err)
     def on_search_changed(self): on_search_changed(self)
@@ -61,4 +63,4 @@ class ROMSearchTab(QWidget):
     def show_rom_details(self, rom): show_rom_details(self, rom)
     def clear_rom_details(self): clear_rom_details(self)
     def download_selected_rom(self): download_selected_rom(self)
-    def on_download_finished(self, success, msg): on_download_finished(self, success, msg)
+    def shutdown(self): shutdown(self)
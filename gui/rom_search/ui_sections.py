@@ -1,12 +1,13 @@
 from PyQt5.QtWidgets import (
     QGroupBox, QGridLayout, QLabel, QComboBox, QPushButton, QLineEdit,
-    QHBoxLayout, QCheckBox, QProgressBar, QListWidget, QTextEdit,
-    QVBoxLayout, QSplitter, QWidget
+    QHBoxLayout, QCheckBox, QProgressBar, QListWidget, QListView, QTextEdit,
+    QVBoxLayout, QSplitter, QWidget, QTableWidget, QHeaderView, QAbstractItemView
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 
 from .styles import get_primary_button_style, get_secondary_button_style
+from .rom_list_model import ROMListModel
 
 
 def create_search_section(self):
@@ -54,7 +55,12 @@ def create_rom_list_section(self):
     self.rom_count_label = QLabel("No ROMs loaded")
     self.rom_count_label.setFont(QFont("Arial", 10))
     lbox.addWidget(self.rom_count_label)
-    self.rom_list = QListWidget()
+    self.rom_list = QListView()
+    self.rom_list.setUniformItemSizes(True)
+    self.rom_list.setEditTriggers(QListView.NoEditTriggers)
+    self.rom_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+    self.rom_model = ROMListModel(self.rom_list)
+    self.rom_list.setModel(self.rom_model)
     lbox.addWidget(self.rom_list)
     left.setLayout(lbox)
 
@@ -86,23 +92,48 @@ def create_rom_text_section(self):
 
 
 def create_download_section(self):
-    group = QGroupBox("Download")
-    layout = QHBoxLayout()
+    group = QGroupBox("Download Queue")
+    layout = QVBoxLayout()
+    top = QHBoxLayout()
 
     # Button (¼ width)
-    self.download_btn = QPushButton("⬇️ Download Selected ROM")
+    self.download_btn = QPushButton("⬇️ Download Selected ROMs")
     self.download_btn.setEnabled(True)
     self.download_btn.setStyleSheet(get_primary_button_style())
     self.download_btn.setFixedHeight(40)
-    layout.addWidget(self.download_btn, 1)  # stretch factor 1
+    top.addWidget(self.download_btn, 1)  # stretch factor 1
 
-    # Progress bar (¾ width)
+    # Overall queue progress (¾ width)
     self.download_progress = QProgressBar()
     self.download_progress.setVisible(True)
     self.download_progress.setTextVisible(True)
-    self.download_progress.setFormat("%p%")
+    self.download_progress.setFormat("%v/%m finished")
     self.download_progress.setFixedHeight(30)
-    layout.addWidget(self.download_progress, 3)  # stretch factor 3
+    top.addWidget(self.download_progress, 3)  # stretch factor 3
+    layout.addLayout(top)
+
+    # One row per queued ROM
+    self.queue_table = QTableWidget(0, 3)
+    self.queue_table.setHorizontalHeaderLabels(["ROM", "Status", "Progress"])
+    self.queue_table.verticalHeader().setVisible(False)
+    self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    self.queue_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    self.queue_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+    self.queue_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    self.queue_table.setMaximumHeight(160)
+    layout.addWidget(self.queue_table)
+
+    buttons = QHBoxLayout()
+    self.retry_download_btn = QPushButton("🔁 Retry")
+    self.cancel_download_btn = QPushButton("✖ Cancel")
+    self.cancel_all_downloads_btn = QPushButton("⏹ Cancel All")
+    self.clear_finished_btn = QPushButton("🧹 Clear Finished")
+    for button in (self.retry_download_btn, self.cancel_download_btn,
+                   self.cancel_all_downloads_btn, self.clear_finished_btn):
+        button.setStyleSheet(get_secondary_button_style())
+        buttons.addWidget(button)
+    buttons.addStretch()
+    layout.addLayout(buttons)
 
     group.setLayout(layout)
     return group
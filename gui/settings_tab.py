@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QGridLayout, QLabel, QLineEdit,
-    QPushButton, QGroupBox, QFileDialog, QMessageBox
+    QPushButton, QGroupBox, QFileDialog, QMessageBox, QComboBox
 )
 from PyQt5.QtCore import Qt
 
@@ -16,6 +16,7 @@ class SettingsTab(QWidget):
 
         # API and download path settings
         self.setup_api_and_path_settings(layout)
+        self.setup_diagnostics_settings(layout)
 
         # Save button
         save_btn = QPushButton("💾 Save Settings")
@@ -55,6 +56,23 @@ class SettingsTab(QWidget):
 
         layout.addWidget(group)
 
+    def setup_diagnostics_settings(self, layout):
+        group = QGroupBox("Diagnostics")
+        grid = QGridLayout(group)
+
+        grid.addWidget(QLabel("Profiling:"), 0, 0)
+        self.profiling_combo = QComboBox()
+        self.profiling_combo.addItem("Off", "")
+        self.profiling_combo.addItem("CPU (every call, main thread only, slow)", "cpu")
+        self.profiling_combo.addItem("Sampling (all threads, low overhead)", "sample")
+        grid.addWidget(self.profiling_combo, 0, 1)
+
+        profiling_help = QLabel("Reports for collection runs, ROM loads and searches are written to the diagnostics folder.")
+        profiling_help.setStyleSheet("color: #7f8c8d; font-style: italic;")
+        grid.addWidget(profiling_help, 1, 0, 1, 2)
+
+        layout.addWidget(group)
+
     def toggle_api_key_visibility(self):
         if self.api_key_edit.echoMode() == QLineEdit.Password:
             self.api_key_edit.setEchoMode(QLineEdit.Normal)
@@ -70,6 +88,8 @@ class SettingsTab(QWidget):
     def load_settings(self):
         self.api_key_edit.setText(self.parent.get_api_key())
         self.path_edit.setText(self.parent.get_download_path())
+        index = self.profiling_combo.findData(self.parent.config.profiling_mode)
+        self.profiling_combo.setCurrentIndex(max(0, index))
 
     def save_settings(self):
         api_key = self.api_key_edit.text().strip()
@@ -84,11 +104,22 @@ class SettingsTab(QWidget):
 
         self.parent.set_api_key(api_key)
         self.parent.set_download_path(download_path)
-        self.parent.config.save_config(api_key=api_key, download_path=download_path)
-        
+        profiling_mode = self.profiling_combo.currentData()
+        self.parent.config.save_config(api_key=api_key, download_path=download_path,
+                                       profiling_mode=profiling_mode)
+        self.apply_profiling(profiling_mode)
 
         QMessageBox.information(self, "Settings Saved", "Settings saved successfully.")
 
+    def apply_profiling(self, mode):
+        """Switch profiling on or off for the rest of the session"""
+        from utils.profiling import profiler
+        config = self.parent.config
+        profiler.configure(
+            mode, config.get_profiles_dir(), config.profiling_sample_interval,
+            config.profiling_memory, config.profiling_top_allocations
+        )
+
     def add_version_info(self, layout):
         version_label = QLabel("Version: 1.1.9-Beta - developed and maintained by devbenji 😎")
         version_label.setStyleSheet("color: #7f8c8d; font-size: 8pt; font-style: italic;")
@@ -6,17 +6,25 @@ Main entry point for the application
 
 import sys
 import os
+import time
+import multiprocessing
+
+STARTUP_STARTED = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import QDir
+from PyQt5.QtCore import QDir, QEvent, QObject, QTimer
 from dotenv import load_dotenv
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from core.config import config
 from gui.main_window import ROMCollectorGUI
 from gui.styles import get_main_window_style
 
+IMPORTS_DONE = time.perf_counter()
+
 def get_icon_path():
     """Get the path to the application icon (PyInstaller compatible)"""
     def resource_path(relative_path):
@@ -44,10 +52,60 @@ def get_icon_path():
     # Return None if no icon found
     return None
 
+class FirstPaintTimer(QObject):
+    """Prints import time and time-to-first-paint when the watched window first paints"""
+
+    def __init__(self, app, window):
+        super().__init__(window)
+        self.app = app
+        self.window = window
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is self.window and event.type() == QEvent.Paint:
+            self.window.removeEventFilter(self)
+            # Timed once this paint, and the children painted with it, has been handled
+            QTimer.singleShot(0, self.report)
+        return False
+
+    def report(self):
+        painted = time.perf_counter()
+        should_exit = os.environ.get('RA_STARTUP_TIMING') == 'exit'
+        if sys.stderr is None:  # Windowed PyInstaller builds have no console
+            if should_exit:
+                self.app.quit()
+            return
+        sys.stderr.write(
+            f"startup_timing imports_ms={(IMPORTS_DONE - STARTUP_STARTED) * 1000:.1f} "
+            f"first_paint_ms={(painted - STARTUP_STARTED) * 1000:.1f}\n"
+        )
+        sys.stderr.flush()
+        if should_exit:
+            self.app.quit()
+
+def report_startup_timing(app, window):
+    """Print import time and time-to-first-paint when RA_STARTUP_TIMING is set"""
+    return FirstPaintTimer(app, window)
+
+def configure_profiling():
+    """Turn on profiling when PROFILING is set in the environment, .env or the settings"""
+    if not config.profiling_mode:
+        return
+    from utils.profiling import profiler
+    try:
+        profiler.configure(
+            config.profiling_mode, config.get_profiles_dir(), config.profiling_sample_interval,
+            config.profiling_memory, config.profiling_top_allocations
+        )
+    except ValueError as e:
+        if sys.stderr is not None:
+            sys.stderr.write(f"{e}\n")
+
 def main():
     """Main entry point for the application"""
     # Load environment variables
     load_dotenv()
+    configure_profiling()
     
     # Create the QApplication
     app = QApplication(sys.argv)
@@ -83,6 +141,10 @@ def main():
     if icon_path:
         window.setWindowIcon(QIcon(icon_path))
     
+    # Watch for the first paint before the window is shown
+    if os.environ.get('RA_STARTUP_TIMING'):
+        report_startup_timing(app, window)
+    
     window.show()
     
     # Run the application
@@ -90,4 +152,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Lets archive extraction worker processes start from the frozen executable
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Archive testing and extraction, safe to run in worker processes
+"""
+
+import os
+import shutil
+import time
+import zipfile
+from typing import Dict, List, Tuple
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+ZIP_EXTENSIONS = ('.zip',)
+SEVEN_ZIP_EXTENSIONS = ('.7z',)
+
+
+def can_extract(filepath: str) -> bool:
+    """Check if an archive type can be tested and extracted here"""
+    name = filepath.lower()
+    if name.endswith(ZIP_EXTENSIONS):
+        return True
+    return py7zr is not None and name.endswith(SEVEN_ZIP_EXTENSIONS)
+
+
+def _extract_zip(archive_path: str, staging_dir: str) -> None:
+    with zipfile.ZipFile(archive_path) as archive:
+        # Members are CRC checked as they are read, so extracting is also the test
+        archive.extractall(staging_dir)
+
+
+def _extract_7z(archive_path: str, staging_dir: str) -> None:
+    with py7zr.SevenZipFile(archive_path, mode='r') as archive:
+        archive.extractall(path=staging_dir)
+
+
+def _move_into_place(staging_dir: str, dest_dir: str, prefix: str = '') -> Tuple[List[str], List[str]]:
+    """
+    Move extracted entries into the destination without touching what is already there
+
+    Folders that already exist are merged into; files and folders already
+    present are left as they are and reported as skipped.
+
+    Returns:
+        Tuple of (top-level names moved or merged, relative paths skipped)
+    """
+    names, skipped = [], []
+    for name in sorted(os.listdir(staging_dir)):
+        source = os.path.join(staging_dir, name)
+        target = os.path.join(dest_dir, name)
+        if not os.path.lexists(target):
+            os.replace(source, target)
+            names.append(name)
+        elif os.path.isdir(source) and os.path.isdir(target) and not os.path.islink(target):
+            _, nested_skipped = _move_into_place(source, target, f"{prefix}{name}/")
+            skipped.extend(nested_skipped)
+            names.append(name)
+        else:
+            skipped.append(prefix + name)
+    return names, skipped
+
+
+def process_archive(archive_path: str, dest_dir: str, delete_archive: bool = False) -> Dict:
+    """
+    Test an archive and extract it into a folder, optionally deleting it after
+
+    Members are extracted into a hidden staging folder first, so a
+    corrupt archive leaves nothing half-written in the destination.
+    Existing files are never overwritten; an archive with skipped
+    members is kept even when deletion was asked for.
+
+    Returns:
+        Dict with 'archive', 'status' ('extracted', 'failed' or 'skipped'),
+        'files', 'skipped', 'seconds' and 'error'
+    """
+    result = {'archive': archive_path, 'status': 'skipped', 'files': [], 'skipped': [],
+              'seconds': 0.0, 'error': None}
+    if not can_extract(archive_path):
+        return result
+
+    started = time.perf_counter()
+    staging_dir = os.path.join(dest_dir, f".extracting-{os.path.basename(archive_path)}")
+    try:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        if archive_path.lower().endswith(ZIP_EXTENSIONS):
+            _extract_zip(archive_path, staging_dir)
+        else:
+            _extract_7z(archive_path, staging_dir)
+        result['files'], result['skipped'] = _move_into_place(staging_dir, dest_dir)
+        result['status'] = 'extracted'
+
+        if (delete_archive and not result['skipped']
+                and os.path.basename(archive_path) not in result['files']):
+            os.remove(archive_path)
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    result['seconds'] = time.perf_counter() - started
+    return result
@@ -0,0 +1,116 @@
+"""
+Cooperative cancellation shared between a controlling thread and its workers
+"""
+
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+class Cancelled(Exception):
+    """Raised inside an operation whose cancellation token was cancelled"""
+
+    def __init__(self, message: str = "Cancelled"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """
+    Set once to ask every operation holding the token to stop
+
+    Workers poll it between chunks, sleep through sleep() so a cancel
+    wakes them at once, and register callbacks that abort blocking I/O
+    such as open sockets. set() and is_set() mirror threading.Event.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+
+    def cancel(self) -> None:
+        """Cancel the token and run the registered callbacks"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # One failed abort must not stop the others
+
+    set = cancel
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    is_set = is_cancelled
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or the timeout passes, returning whether cancelled"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep, raising Cancelled as soon as the token is cancelled"""
+        if self._event.wait(max(0.0, seconds)):
+            raise Cancelled()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run a callback when the token is cancelled, or now if it already is
+
+        Returns:
+            A function that unregisters the callback
+        """
+        with self._lock:
+            if not self._event.is_set():
+                callback_id = self._next_id
+                self._next_id += 1
+                self._callbacks[callback_id] = callback
+                return lambda: self._unregister(callback_id)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback_id: int) -> None:
+        with self._lock:
+            self._callbacks.pop(callback_id, None)
+
+
+def abort_response(response) -> None:
+    """
+    Unblock a thread reading a streamed requests response
+
+    Shutting the socket down makes a blocked read return at once; the
+    reading thread still closes the response itself.
+    """
+    raw = getattr(response, 'raw', None)
+    connection = getattr(raw, 'connection', None) or getattr(raw, '_connection', None)
+    sock = getattr(connection, 'sock', None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+@contextmanager
+def abort_on_cancel(cancel: Optional[CancellationToken], response):
+    """Abort a streamed response if the token is cancelled while the block runs"""
+    if cancel is None:
+        yield
+        return
+    unregister = cancel.on_cancel(lambda: abort_response(response))
+    try:
+        yield
+    finally:
+        unregister()
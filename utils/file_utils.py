@@ -2,12 +2,18 @@
 File operation utilities
 """
 
+import json
 import os
+import re
 import requests
 from pathlib import Path
 from typing import Tuple, Optional, Generator
+from .cancellation import Cancelled, abort_on_cancel
 from .text_utils import clean_filename
 
+# Byte offsets only line up with the file when responses aren't content-encoded
+RAW_BYTES_HEADERS = {'Accept-Encoding': 'identity'}
+
 
 def create_console_directory(base_path: str, console: str) -> str:
     """Create console-specific directory"""
@@ -28,32 +34,171 @@ def get_file_path(base_path: str, console: str, filename: str) -> str:
     return os.path.join(console_dir, cleaned_filename)
 
 
-def download_file(url: str, filepath: str, chunk_size: int = 8192) -> Generator[Tuple[int, int], None, None]:
+def get_part_path(filepath: str) -> str:
+    """Get the in-progress download path for a file"""
+    return f"{filepath}.part"
+
+
+def get_part_meta_path(filepath: str) -> str:
+    """Get the resume metadata path for an in-progress download"""
+    return f"{filepath}.part.json"
+
+
+def load_part_meta(filepath: str) -> dict:
+    """Load resume metadata for an in-progress download"""
+    try:
+        with open(get_part_meta_path(filepath), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_part_meta(filepath: str, meta: dict) -> None:
+    """Save resume metadata for an in-progress download"""
+    with open(get_part_meta_path(filepath), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def remove_part_files(filepath: str) -> None:
+    """Remove the in-progress download and its metadata"""
+    for path in (get_part_path(filepath), get_part_meta_path(filepath)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def parse_content_range(value: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parse a Content-Range header into (start, total)"""
+    match = re.match(r'bytes\s+(\d+)-\d+/(\d+|\*)', value or '')
+    if not match:
+        return None, None
+    total = match.group(2)
+    return int(match.group(1)), (int(total) if total != '*' else None)
+
+
+def hash_file(filepath: str, hasher, limit: Optional[int] = None, chunk_size: int = 1024 * 1024,
+              offset: int = 0) -> None:
+    """Feed a file, or `limit` bytes of it from `offset`, to a hasher"""
+    remaining = limit
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+
+def download_file(url: str, filepath: str, chunk_size: int = 8192, session=None,
+                  hasher=None, timeout=None, mirror_urls=(), cancel=None) -> Generator[Tuple[int, int], None, None]:
     """
     Download file with progress reporting
     
+    Data is written to a .part file that is resumed with a Range request
+    when possible, and only renamed into place once complete. A partial
+    file from any of `mirror_urls` is resumed too, provided the sizes
+    match. A hasher is fed every byte of the file as it is written; on
+    resume only the existing partial data is read back. Cancelling the
+    `cancel` token aborts the transfer with Cancelled, keeping the .part
+    file for a later resume.
+    
     Yields:
         Tuple of (downloaded_bytes, total_bytes)
     """
+    http = session or requests
+    part_path = get_part_path(filepath)
+    meta = load_part_meta(filepath)
+    
+    resume_from = 0
+    same_url = meta.get('url') == url
+    if os.path.exists(part_path) and (same_url or meta.get('url') in mirror_urls) and 'ranges' not in meta:
+        resume_from = os.path.getsize(part_path)
+    
+    headers = dict(RAW_BYTES_HEADERS)
+    if resume_from:
+        headers['Range'] = f"bytes={resume_from}-"
+        validator = meta.get('etag') or meta.get('last_modified')
+        if validator and same_url:
+            headers['If-Range'] = validator
+    
     try:
-        response = requests.get(url, stream=True)
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        response = http.get(url, stream=True, headers=headers, timeout=timeout)
+        if response.status_code == 416 and resume_from and resume_from == meta.get('total'):
+            # Everything was already downloaded before the last run stopped
+            response.close()
+            if hasher is not None:
+                hasher.reset()
+                hash_file(part_path, hasher)
+            os.replace(part_path, filepath)
+            remove_part_files(filepath)
+            yield resume_from, resume_from
+            return
+        if response.status_code == 416 and resume_from:
+            # The partial file no longer lines up with the remote file
+            response.close()
+            remove_part_files(filepath)
+            resume_from = 0
+            response = http.get(url, stream=True, headers=RAW_BYTES_HEADERS, timeout=timeout)
         response.raise_for_status()
         
-        total_size = int(response.headers.get('Content-Length', 0))
-        downloaded = 0
+        if response.status_code == 206:
+            start, total_size = parse_content_range(response.headers.get('Content-Range'))
+            if start != resume_from:
+                raise Exception(f"Server resumed at byte {start}, expected {resume_from}")
+            if not same_url and total_size != meta.get('total'):
+                response.close()
+                raise Exception(f"{url} serves a different file than the partial download")
+            total_size = total_size or 0
+            downloaded = resume_from
+            mode = 'ab'
+            if hasher is not None:
+                hasher.reset()
+                hash_file(part_path, hasher, resume_from)
+        else:
+            total_size = int(response.headers.get('Content-Length', 0))
+            downloaded = 0
+            mode = 'wb'
+            if hasher is not None:
+                hasher.reset()
+        
+        save_part_meta(filepath, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'total': total_size
+        })
         
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    yield downloaded, total_size
+        with abort_on_cancel(cancel, response), open(part_path, mode) as f:
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if cancel is not None and cancel.is_cancelled():
+                        raise Cancelled()
+                    if chunk:
+                        f.write(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        downloaded += len(chunk)
+                        yield downloaded, total_size
+            finally:
+                response.close()
                     
     except requests.RequestException as e:
-        # Clean up partial file on error
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        # Keep the partial file so the next attempt can resume
+        if cancel is not None and cancel.is_cancelled():
+            raise Cancelled() from e
         raise Exception(f"Download failed: {e}")
+    
+    # An aborted socket can look like the end of the body
+    if cancel is not None and cancel.is_cancelled():
+        raise Cancelled()
+    if total_size and downloaded != total_size:
+        raise Exception(f"Download incomplete: {downloaded} of {total_size} bytes")
+    
+    os.replace(part_path, filepath)
+    remove_part_files(filepath)
 
 
 def get_directory_size(path: str) -> int:
@@ -0,0 +1,264 @@
+"""
+Incremental hashing of downloads, including the members of zip archives
+"""
+
+import bz2
+import hashlib
+import struct
+import zlib
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Bytes collected before a header probe decides how much to skip
+HEADER_PROBE_SIZE = 16
+
+ZIP_LOCAL_HEADER = b'PK\x03\x04'
+ZIP_DATA_DESCRIPTOR = b'PK\x07\x08'
+ZIP_LOCAL_HEADER_FORMAT = struct.Struct('<4sHHHHHIIIHH')
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_BZIP2 = 12
+
+
+class StreamHasher:
+    """
+    MD5, SHA1 and CRC32 of a byte stream, fed chunk by chunk
+
+    With a header_probe, an extra MD5 is kept of the data after the
+    number of leading bytes the probe returns for the first
+    HEADER_PROBE_SIZE bytes (e.g. a copier or emulator header).
+    """
+
+    def __init__(self, header_probe: Optional[Callable[[bytes], int]] = None):
+        self.header_probe = header_probe
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything hashed so far"""
+        self.md5 = hashlib.md5()
+        self.sha1 = hashlib.sha1()
+        self.crc32 = 0
+        self.size = 0
+        self.headerless_md5 = None
+        self._head = bytearray()
+        self._skip = None if self.header_probe else 0
+
+    def update(self, data: bytes) -> None:
+        """Hash the next chunk of the stream"""
+        self.md5.update(data)
+        self.sha1.update(data)
+        self.crc32 = zlib.crc32(data, self.crc32)
+        if self._skip != 0:
+            self._update_headerless(data, self.size)
+        self.size += len(data)
+
+    def _update_headerless(self, data: bytes, start: int) -> None:
+        if self._skip is None:
+            self._head += data
+            if len(self._head) < HEADER_PROBE_SIZE:
+                return
+            self._skip = self.header_probe(bytes(self._head[:HEADER_PROBE_SIZE]))
+            data, start = bytes(self._head), 0
+            self._head = bytearray()
+            if self._skip:
+                self.headerless_md5 = hashlib.md5()
+
+        if self.headerless_md5 is not None and start + len(data) > self._skip:
+            self.headerless_md5.update(data[max(0, self._skip - start):])
+
+    def digests(self) -> Dict:
+        """Get the hex digests and size of everything hashed so far"""
+        result = {
+            'size': self.size,
+            'md5': self.md5.hexdigest(),
+            'sha1': self.sha1.hexdigest(),
+            'crc32': f"{self.crc32:08x}"
+        }
+        if self.headerless_md5 is not None:
+            result['md5_headerless'] = self.headerless_md5.hexdigest()
+        return result
+
+    def get_md5s(self) -> Set[str]:
+        """Get every MD5 the stream could be identified by"""
+        md5s = {self.md5.hexdigest()}
+        if self.headerless_md5 is not None:
+            md5s.add(self.headerless_md5.hexdigest())
+        return md5s
+
+
+class _ZipMember:
+    def __init__(self, name: str, flags: int, method: int, compressed_size: Optional[int],
+                 hasher: Optional[StreamHasher]):
+        self.name = name
+        self.flags = flags
+        self.remaining = compressed_size
+        self.hasher = hasher
+        self.zip64 = False
+        if method == ZIP_DEFLATED:
+            self.decompressor = zlib.decompressobj(-15)
+        elif method == ZIP_BZIP2:
+            self.decompressor = bz2.BZ2Decompressor()
+        else:
+            self.decompressor = None
+
+    @property
+    def has_descriptor(self) -> bool:
+        return bool(self.flags & 0x08)
+
+
+class ZipStreamHasher:
+    """
+    Hashes the uncompressed members of a zip archive as it streams in
+
+    Local file headers are parsed in order and each member is inflated
+    into its own StreamHasher, so the archive never has to be re-read.
+    Members that are encrypted or use other compression methods are
+    listed without a hasher, and `supported` turns False if the stream
+    can't be followed past one.
+    """
+
+    def __init__(self, member_hasher: Callable[[str], StreamHasher] = lambda name: StreamHasher()):
+        self.member_hasher = member_hasher
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything hashed so far"""
+        self.members: List[Tuple[str, Optional[StreamHasher]]] = []
+        self.supported = True
+        self._buffer = bytearray()
+        self._member: Optional[_ZipMember] = None
+        self._in_descriptor = False
+        self._descriptor_zip64 = False
+        self._done = False
+
+    def update(self, data: bytes) -> None:
+        """Hash the next chunk of the archive"""
+        if self._done:
+            return
+        self._buffer += data
+        while not self._done:
+            if self._in_descriptor:
+                progressed = self._skip_descriptor()
+            elif self._member is None:
+                progressed = self._read_header()
+            else:
+                progressed = self._read_data()
+            if not progressed:
+                break
+
+    def get_md5s(self) -> Set[str]:
+        """Get every MD5 the archive's hashed members could be identified by"""
+        md5s = set()
+        for _, hasher in self.members:
+            if hasher is not None:
+                md5s |= hasher.get_md5s()
+        return md5s
+
+    @property
+    def complete(self) -> bool:
+        """Whether every member was hashed"""
+        return self.supported and bool(self.members) and all(h is not None for _, h in self.members)
+
+    def _stop(self, supported: bool = True) -> bool:
+        self.supported = self.supported and supported
+        self._done = True
+        self._buffer = bytearray()
+        return False
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        if self._buffer[:4] != ZIP_LOCAL_HEADER:
+            # Central directory reached, every member has been seen
+            return self._stop()
+        if len(self._buffer) < ZIP_LOCAL_HEADER_FORMAT.size:
+            return False
+
+        (_, _, flags, method, _, _, _, compressed_size, size,
+         name_length, extra_length) = ZIP_LOCAL_HEADER_FORMAT.unpack_from(self._buffer)
+        header_end = ZIP_LOCAL_HEADER_FORMAT.size + name_length + extra_length
+        if len(self._buffer) < header_end:
+            return False
+
+        name_start = ZIP_LOCAL_HEADER_FORMAT.size
+        raw_name = bytes(self._buffer[name_start:name_start + name_length])
+        name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437', errors='replace')
+        extra = bytes(self._buffer[name_start + name_length:header_end])
+        del self._buffer[:header_end]
+
+        zip64 = compressed_size == 0xFFFFFFFF or size == 0xFFFFFFFF
+        if zip64:
+            compressed_size = self._read_zip64_size(extra, size == 0xFFFFFFFF)
+
+        if flags & 0x08 and method != ZIP_DEFLATED and method != ZIP_BZIP2:
+            # Without a known length or end marker the next header can't be found
+            return self._stop(supported=False)
+
+        hashable = not flags & 0x01 and method in (ZIP_STORED, ZIP_DEFLATED, ZIP_BZIP2)
+        if not hashable and (flags & 0x08 or compressed_size is None):
+            return self._stop(supported=False)
+
+        known_size = None if flags & 0x08 else compressed_size
+        member = _ZipMember(name, flags, method if hashable else ZIP_STORED, known_size,
+                            self.member_hasher(name) if hashable else None)
+        member.zip64 = zip64
+        self.members.append((name, member.hasher))
+        self._member = member
+        return True
+
+    @staticmethod
+    def _read_zip64_size(extra: bytes, has_size: bool) -> Optional[int]:
+        """Get the compressed size from a zip64 extra field"""
+        pos = 0
+        while pos + 4 <= len(extra):
+            header_id, length = struct.unpack_from('<HH', extra, pos)
+            if header_id == 0x0001:
+                offset = pos + 4 + (8 if has_size else 0)
+                if offset + 8 <= pos + 4 + length:
+                    return struct.unpack_from('<Q', extra, offset)[0]
+                return None
+            pos += 4 + length
+        return None
+
+    def _read_data(self) -> bool:
+        member = self._member
+        if not self._buffer and member.remaining != 0:
+            return False
+
+        if member.decompressor is None:
+            count = min(len(self._buffer), member.remaining)
+            if member.hasher is not None:
+                member.hasher.update(bytes(self._buffer[:count]))
+            del self._buffer[:count]
+            member.remaining -= count
+            finished = member.remaining == 0
+        else:
+            if member.remaining is None:
+                data = bytes(self._buffer)
+            else:
+                data = bytes(self._buffer[:member.remaining])
+            member.hasher.update(member.decompressor.decompress(data))
+            finished = member.decompressor.eof
+            consumed = len(data) - len(member.decompressor.unused_data) if finished else len(data)
+            del self._buffer[:consumed]
+            if member.remaining is not None:
+                member.remaining -= consumed
+                if member.remaining == 0 and not finished:
+                    return self._stop(supported=False)
+
+        if finished:
+            self._member = None
+            self._in_descriptor = member.has_descriptor
+            self._descriptor_zip64 = member.zip64
+        return True
+
+    def _skip_descriptor(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        length = 20 if self._descriptor_zip64 else 12
+        if self._buffer[:4] == ZIP_DATA_DESCRIPTOR:
+            length += 4
+        if len(self._buffer) < length:
+            return False
+        del self._buffer[:length]
+        self._in_descriptor = False
+        return True
@@ -0,0 +1,266 @@
+"""
+Lightweight run instrumentation: timed spans, counters and histograms
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+THROUGHPUT_BUCKETS = tuple(float(2 ** power) for power in range(14, 28, 2))  # 16 KiB/s to 64 MiB/s
+
+# Spans kept per run; later ones are counted but not traced
+MAX_TRACE_EVENTS = 100000
+
+
+class _NullSpan:
+    """Stands in for a span while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed operation, nested under the span open on the same thread"""
+
+    def __init__(self, metrics: 'Metrics', name: str, attrs: Dict):
+        self.metrics = metrics
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(metrics._ids)
+        self.parent_id = None
+
+    def __enter__(self):
+        stack = self.metrics._stack()
+        self.parent_id = stack[-1].span_id if stack else None
+        stack.append(self)
+        self.wall_start = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.started
+        stack = self.metrics._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.metrics._finish_span(self, duration)
+        return False
+
+    def set(self, **attrs):
+        """Attach attributes known only once the operation is under way"""
+        self.attrs.update(attrs)
+
+
+class Metrics:
+    """
+    Collects spans, counters and histograms for one run at a time
+
+    While disabled every call returns straight away and span() hands
+    back a shared no-op span, so instrumented code costs next to nothing.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything recorded so far"""
+        with self._lock:
+            self.events: List[Dict] = []
+            self.dropped_events = 0
+            self.counters: Dict[Tuple, float] = {}
+            self.histograms: Dict[Tuple, Dict] = {}
+            self.span_stats: Dict[str, Dict] = {}
+            self.started_at = time.time()
+
+    def start(self, enabled: bool) -> None:
+        """Begin a new run, enabling or disabling collection"""
+        self.enabled = enabled
+        if enabled:
+            self.reset()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, **attrs):
+        """Time a block: `with metrics.span('listing.fetch', host=host) as span:`"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = SECONDS_BUCKETS,
+                **labels) -> None:
+        """Record a value in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': buckets, 'counts': [0] * len(buckets), 'count': 0, 'sum': 0.0
+                }
+            for i, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+                    break
+            histogram['count'] += 1
+            histogram['sum'] += value
+
+    def _finish_span(self, span: Span, duration: float) -> None:
+        with self._lock:
+            stats = self.span_stats.setdefault(span.name, {'count': 0, 'total': 0.0, 'max': 0.0, 'errors': 0})
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+            if 'error' in span.attrs:
+                stats['errors'] += 1
+
+            if len(self.events) >= MAX_TRACE_EVENTS:
+                self.dropped_events += 1
+                return
+            self.events.append({
+                'name': span.name,
+                'span_id': span.span_id,
+                'parent_id': span.parent_id,
+                'start': round(span.wall_start, 6),
+                'duration': round(duration, 6),
+                'thread': threading.current_thread().name,
+                'attrs': span.attrs
+            })
+
+    def write_trace(self, path: str) -> None:
+        """Write every traced span as one JSON object per line"""
+        with self._lock:
+            events = list(self.events)
+        _write_atomic(path, "".join(json.dumps(event, default=str) + "\n" for event in events))
+
+    def to_prometheus(self) -> str:
+        """Render counters, histograms and span timings in the Prometheus text format"""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: dict(value, counts=list(value['counts'])) for key, value in self.histograms.items()}
+            span_stats = {name: dict(stats) for name, stats in self.span_stats.items()}
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            declare(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            declare(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+        for suffix, field, kind in (('seconds_total', 'total', 'counter'), ('calls_total', 'count', 'counter'),
+                                    ('errors_total', 'errors', 'counter'), ('seconds_max', 'max', 'gauge')):
+            name = f"span_{suffix}"
+            for span_name, stats in sorted(span_stats.items()):
+                declare(name, kind)
+                lines.append(f"{name}{_format_labels((('span', span_name),))} {_format_value(stats[field])}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        _write_atomic(path, self.to_prometheus())
+
+    def export(self, directory: str, run_name: Optional[str] = None) -> Dict[str, str]:
+        """
+        Write this run's trace and metrics into a directory
+
+        The trace gets a per-run file; metrics.prom is replaced each run so
+        a node_exporter textfile collector can scrape the latest values.
+
+        Returns:
+            Dict with the 'trace' and 'prometheus' file paths
+        """
+        run_name = run_name or time.strftime('run-%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        paths = {
+            'trace': os.path.join(directory, f"{run_name}.trace.jsonl"),
+            'prometheus': os.path.join(directory, "metrics.prom")
+        }
+        os.makedirs(directory, exist_ok=True)
+        self.write_trace(paths['trace'])
+        self.write_prometheus(paths['prometheus'])
+        return paths
+
+    def summary(self) -> List[str]:
+        """Format span timings and counters as a plain text table"""
+        with self._lock:
+            span_stats = sorted(self.span_stats.items(), key=lambda item: -item[1]['total'])
+            counters = sorted(self.counters.items())
+
+        lines = [f"{'stage':<24} {'count':>6} {'total':>9} {'mean':>9} {'max':>9} {'errors':>6}"]
+        for name, stats in span_stats:
+            mean = stats['total'] / stats['count'] if stats['count'] else 0.0
+            lines.append(f"{name:<24} {stats['count']:>6} {stats['total']:>8.2f}s {mean:>8.3f}s "
+                         f"{stats['max']:>8.3f}s {stats['errors']:>6}")
+        for (name, labels), value in counters:
+            lines.append(f"{name}{_format_labels(labels)} = {_format_value(value)}")
+        if self.dropped_events:
+            lines.append(f"{self.dropped_events} span(s) were not traced")
+        return lines
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _write_atomic(path: str, data: str) -> None:
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+# Shared by the collector, the HTTP transport and the download helpers
+metrics = Metrics()
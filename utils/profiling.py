@@ -0,0 +1,256 @@
+"""
+Opt-in CPU and memory profiling of long-running sections
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, List, Optional
+
+# Profiling modes
+OFF = ''
+CPU = 'cpu'  # cProfile: every call on the section's own thread, with high overhead
+SAMPLE = 'sample'  # periodic stack samples of every thread, cheap enough for long runs
+MODES = (OFF, CPU, SAMPLE)
+
+# Frames tracemalloc keeps per allocation
+TRACEMALLOC_FRAMES = 10
+
+# cProfile, pstats and tracemalloc are only imported once a section is profiled,
+# so importing this module stays cheap while profiling is off
+
+
+class _NullSection:
+    """Stands in for a section while profiling is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SECTION = _NullSection()
+
+
+class StackSampler:
+    """Samples the call stacks of all threads at a fixed interval on a background thread"""
+
+    def __init__(self, interval: float):
+        self.interval = max(0.001, interval)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_folded(self, path: str) -> None:
+        """Write stacks in the collapsed format read by flamegraph.pl and speedscope"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSection:
+    """Profiles one run of a section and writes its reports when it ends"""
+
+    def __init__(self, profiler: 'Profiler', name: str, on_report: Optional[Callable[[List[str]], None]]):
+        self.profiler = profiler
+        self.name = name
+        self.on_report = on_report
+        self.cpu_profile = None
+        self.sampler = None
+        self.notes = []
+        self.traces_memory = False
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.traces_memory = self.profiler.memory and self.profiler._start_tracemalloc()
+
+        if self.profiler.mode == SAMPLE:
+            self.sampler = StackSampler(self.profiler.sample_interval)
+            self.sampler.start()
+        elif self.profiler.mode == CPU:
+            import cProfile
+            self.cpu_profile = cProfile.Profile()
+            try:
+                self.cpu_profile.enable()
+                # cProfile only sees the thread that enabled it
+                self.notes.append("CPU mode profiles only the thread that ran the section; work done in "
+                                  "worker threads (downloads, hashing, listing fetches) is not included. "
+                                  "Use sample mode to cover every thread.")
+            except ValueError:
+                # Only one deterministic profiler can be active at a time on newer Pythons
+                self.cpu_profile = None
+                self.notes.append("CPU profile skipped: another section was already being profiled")
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.cpu_profile is not None:
+            self.cpu_profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+        snapshot = peak = None
+        if self.traces_memory:
+            import tracemalloc
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            self.profiler._stop_tracemalloc()
+
+        try:
+            paths = self.write_reports(time.perf_counter() - self.started, snapshot, peak)
+        except OSError:
+            paths = []  # Profiling must never break the section itself
+        if paths and self.on_report is not None:
+            self.on_report(paths)
+        return False
+
+    def write_reports(self, seconds: float, snapshot, peak: Optional[int]) -> List[str]:
+        """Write the section's profile, stack samples and allocation report"""
+        os.makedirs(self.profiler.directory, exist_ok=True)
+        base = os.path.join(self.profiler.directory, self.profiler._next_name(self.name))
+        paths = []
+
+        if self.cpu_profile is not None:
+            import io
+            import pstats
+            self.cpu_profile.dump_stats(base + ".prof")
+            paths.append(base + ".prof")
+            text = io.StringIO()
+            pstats.Stats(self.cpu_profile, stream=text).sort_stats('cumulative').print_stats(40)
+            with open(base + ".cpu.txt", 'w', encoding='utf-8') as f:
+                f.write(f"{self.name}: {seconds:.3f}s\n")
+                f.write(text.getvalue())
+            paths.append(base + ".cpu.txt")
+
+        if self.sampler is not None:
+            self.sampler.write_folded(base + ".folded")
+            paths.append(base + ".folded")
+
+        if snapshot is not None:
+            import tracemalloc
+            with open(base + ".alloc.txt", 'w', encoding='utf-8') as f:
+                f.write(f"{self.name}: {seconds:.3f}s, peak traced memory {peak / 1024 / 1024:.1f} MiB\n")
+                f.write("Allocations still live when the section ended, largest first. "
+                        "Other sections running at the same time are included.\n\n")
+                snapshot = snapshot.filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                ))
+                for stat in snapshot.statistics('traceback')[:self.profiler.top_allocations]:
+                    f.write(f"{stat.size / 1024:.1f} KiB in {stat.count} block(s)\n")
+                    for line in stat.traceback.format(most_recent_first=True)[:6]:
+                        f.write(f"    {line}\n")
+            paths.append(base + ".alloc.txt")
+
+        if self.notes:
+            with open(base + ".notes.txt", 'w', encoding='utf-8') as f:
+                f.write("\n".join(self.notes) + "\n")
+            paths.append(base + ".notes.txt")
+        return paths
+
+
+class Profiler:
+    """
+    Wraps named sections in cProfile or a stack sampler, plus tracemalloc
+
+    cProfile only records the thread a section runs on, so a collection
+    run's downloads, hashing and listing fetches on worker threads only
+    show up in SAMPLE mode, which samples every thread.
+
+    Reports are written per section run into the diagnostics folder so
+    they can be attached to performance bug reports. While the mode is
+    off, section() hands back a shared no-op context.
+    """
+
+    def __init__(self):
+        self.mode = OFF
+        self.directory = ''
+        self.sample_interval = 0.005
+        self.memory = True
+        self.top_allocations = 25
+        self._lock = threading.Lock()
+        self._tracemalloc_users = 0
+        self._sequence = 0
+
+    def configure(self, mode: str, directory: str, sample_interval: float = 0.005,
+                  memory: bool = True, top_allocations: int = 25) -> None:
+        """
+        Args:
+            mode: OFF, CPU or SAMPLE
+            directory: Folder the reports are written to
+            sample_interval: Seconds between stack samples in SAMPLE mode
+            memory: Also trace allocations with tracemalloc
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {', '.join(MODES[1:])}")
+        self.mode = mode
+        self.directory = directory
+        self.sample_interval = sample_interval
+        self.memory = memory
+        self.top_allocations = top_allocations
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != OFF
+
+    def section(self, name: str, on_report: Optional[Callable[[List[str]], None]] = None):
+        """Profile a block: `with profiler.section('search'):`"""
+        if self.mode == OFF:
+            return NULL_SECTION
+        return ProfileSection(self, name, on_report)
+
+    def _next_name(self, name: str) -> str:
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        safe_name = "".join(c if c.isalnum() or c in '-_' else '_' for c in name)
+        return f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{sequence}"
+
+    def _start_tracemalloc(self) -> bool:
+        """Start tracing, shared between overlapping sections"""
+        import tracemalloc
+        with self._lock:
+            if self._tracemalloc_users == 0:
+                if tracemalloc.is_tracing():
+                    return False  # Someone else owns tracing
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._tracemalloc_users += 1
+            return True
+
+    def _stop_tracemalloc(self) -> None:
+        import tracemalloc
+        with self._lock:
+            self._tracemalloc_users -= 1
+            if self._tracemalloc_users == 0:
+                tracemalloc.stop()
+
+
+# Configured from the settings at startup
+profiler = Profiler()
@@ -0,0 +1,59 @@
+"""
+Progress reporting helpers
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+
+class ProgressThrottle:
+    """
+    Coalesces (key, current, total) progress events into bounded-rate snapshots
+
+    Updates only record the latest counts per key. At most `hz` times a
+    second every key that changed since the last publish is handed to the
+    callback, so the number of events no longer depends on chunk size.
+    A key reaching its total is always published immediately.
+    """
+
+    def __init__(self, callback: Callable[[str, int, int], None], hz: float = 15):
+        self.callback = callback
+        self.interval = 1.0 / hz if hz > 0 else 0.0
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._last_publish = 0.0
+
+    def update(self, key: str, current: int, total: int) -> None:
+        """Record progress for a key, publishing if a snapshot is due"""
+        with self._lock:
+            self._pending[key] = (current, total)
+            if 0 < total <= current:
+                # Final events bypass the rate limit so 100% is never lost
+                self._publish(key)
+                return
+
+            now = time.monotonic()
+            if now - self._last_publish >= self.interval:
+                self._last_publish = now
+                self._publish_all()
+
+    def flush(self) -> None:
+        """Publish every pending snapshot regardless of the rate limit"""
+        with self._lock:
+            self._last_publish = time.monotonic()
+            self._publish_all()
+
+    def discard(self, key: str) -> None:
+        """Drop a key's unpublished progress, e.g. once it has finished"""
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _publish(self, key: str) -> None:
+        # Called with the lock held so snapshots for a key are never reordered
+        current, total = self._pending.pop(key)
+        self.callback(key, current, total)
+
+    def _publish_all(self) -> None:
+        for key in list(self._pending):
+            self._publish(key)
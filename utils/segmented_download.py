@@ -0,0 +1,388 @@
+"""
+Segmented multi-connection and multi-mirror downloads for large files
+"""
+
+import os
+import threading
+import time
+import urllib.parse
+from typing import Generator, List, Optional, Tuple
+
+import requests
+
+from .file_utils import (
+    RAW_BYTES_HEADERS, download_file, get_part_path, hash_file, load_part_meta,
+    save_part_meta, remove_part_files, parse_content_range
+)
+from .cancellation import Cancelled, abort_on_cancel
+from .metrics import THROUGHPUT_BUCKETS, metrics
+
+# Idle workers only split segments with at least this many bytes left
+MIN_SPLIT_SIZE = 4 * 1024 * 1024
+
+# Failed segment requests tolerated before the whole download gives up
+MAX_SEGMENT_ERRORS = 8
+
+
+def probe_download(url: str, session=None) -> Tuple[int, bool]:
+    """
+    Get the size of a remote file and whether it supports byte ranges
+
+    Returns:
+        Tuple of (size_bytes, accepts_ranges)
+    """
+    http = session or requests
+    response = http.head(url, allow_redirects=True, headers=RAW_BYTES_HEADERS)
+    response.raise_for_status()
+    size = int(response.headers.get('Content-Length', 0))
+    accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+    return size, accepts_ranges
+
+
+def get_url_filename(url: str) -> str:
+    """Get the unquoted file name at the end of a URL"""
+    return urllib.parse.unquote(os.path.basename(urllib.parse.urlparse(url).path))
+
+
+class _Segment:
+    """A byte range [pos, end) still to be downloaded"""
+    __slots__ = ('pos', 'end', 'active')
+
+    def __init__(self, pos: int, end: int):
+        self.pos = pos
+        self.end = end
+        self.active = False
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.end - self.pos)
+
+
+def split_range(start: int, end: int, segments: int) -> List[List[int]]:
+    """Split [start, end) into up to `segments` contiguous ranges"""
+    step = max(1, -(-(end - start) // segments))
+    return [[pos, min(pos + step, end)] for pos in range(start, end, step)]
+
+
+def get_validator(etag: Optional[str], last_modified: Optional[str]) -> Optional[str]:
+    """Pick the If-Range validator for a saved download, or None"""
+    if etag and not etag.startswith('W/'):  # Weak ETags are never honoured by If-Range
+        return etag
+    return last_modified
+
+
+def record_transfer_metrics(url: str, ttfb: Optional[float], size: int, seconds: float) -> None:
+    """Count a request's bytes and record its host's first-byte latency and throughput"""
+    if not metrics.enabled:
+        return
+    host = urllib.parse.urlparse(url).netloc
+    metrics.count('download_bytes_total', size, host=host)
+    if ttfb is not None:
+        metrics.observe('download_first_byte_seconds', ttfb, host=host)
+    if size > 0 and seconds > 0:
+        metrics.observe('download_throughput_bytes_per_second', size / seconds,
+                        buckets=THROUGHPUT_BUCKETS, host=host)
+
+
+def download_segmented(urls: List[str], filepath: str, total_size: int, segments: int = 4,
+                       chunk_size: int = 65536, session=None,
+                       hasher=None, cancel=None) -> Generator[Tuple[int, int], None, None]:
+    """
+    Download a file as parallel byte ranges spread across mirrors
+
+    Segments are written into a preallocated .part file. Idle connections
+    take over half of the largest remaining segment, so slow ranges are
+    rebalanced instead of holding up the whole file. Ranges arrive out of
+    order, so a hasher is fed the finished prefix of the file as it grows,
+    while the written data is still in the page cache.
+    Cancelling the `cancel` token aborts every connection and raises
+    Cancelled with the remaining ranges saved for a resume.
+
+    A .part file from an earlier segmented or single-connection attempt
+    is resumed when it came from one of the URLs and has the same size.
+    Its URL is asked for ranges with If-Range, and the download starts
+    over if the file has changed since.
+
+    Yields:
+        Tuple of (downloaded_bytes, total_bytes)
+    """
+    http = session or requests
+    part_path = get_part_path(filepath)
+    meta = load_part_meta(filepath)
+
+    resumable = (os.path.exists(part_path) and meta.get('total') == total_size
+                 and meta.get('url') in urls)
+    if resumable and 'ranges' in meta:
+        ranges = meta['ranges']
+    elif resumable:
+        # Left by a single-connection attempt, which writes from the start
+        ranges = split_range(min(os.path.getsize(part_path), total_size), total_size, segments)
+        with open(part_path, 'r+b') as f:
+            f.truncate(total_size)
+    else:
+        meta = {}
+        ranges = split_range(0, total_size, segments)
+        with open(part_path, 'wb') as f:
+            f.truncate(total_size)  # Sparse preallocation
+
+    pending = [_Segment(start, end) for start, end in ranges if end > start]
+    lock = threading.Lock()
+    changed = threading.Event()
+    state = {'errors': 0, 'failure': None, 'stop': False, 'stale': False}
+    mirrors = list(urls)
+    # Resumed ranges are only trusted while this URL still serves the same file
+    validated_url = meta.get('url', urls[0])
+    validators = {'etag': meta.get('etag'), 'last_modified': meta.get('last_modified')}
+    resume_validator = get_validator(meta.get('etag'), meta.get('last_modified'))
+
+    def save_ranges():
+        with lock:
+            remaining = [[s.pos, s.end] for s in pending if s.remaining]
+        save_part_meta(filepath, dict(validators, url=validated_url, total=total_size, ranges=remaining))
+
+    def next_segment():
+        """Claim an idle segment, or split the largest active one"""
+        with lock:
+            pending[:] = [s for s in pending if s.remaining]
+            for segment in pending:
+                if not segment.active:
+                    segment.active = True
+                    return segment
+            busiest = max(pending, key=lambda s: s.remaining, default=None)
+            if busiest is None or busiest.remaining < MIN_SPLIT_SIZE * 2:
+                return None
+            middle = busiest.pos + busiest.remaining // 2
+            stolen = _Segment(middle, busiest.end)
+            stolen.active = True
+            busiest.end = middle
+            pending.append(stolen)
+            return stolen
+
+    def worker(worker_index):
+        with open(part_path, 'r+b') as f:
+            while not state['stop']:
+                segment = next_segment()
+                if segment is None:
+                    return
+                with lock:
+                    url = mirrors[worker_index % len(mirrors)]
+                started = time.monotonic()
+                first_byte = None
+                received = 0
+                response = None
+                headers = dict(RAW_BYTES_HEADERS, Range=f"bytes={segment.pos}-{segment.end - 1}")
+                if resume_validator and url == validated_url:
+                    headers['If-Range'] = resume_validator
+                try:
+                    response = http.get(url, stream=True, headers=headers)
+                    response.raise_for_status()
+                    if response.status_code == 200 and 'If-Range' in headers:
+                        # The file changed since the saved ranges were written
+                        with lock:
+                            state['stale'] = True
+                            state['stop'] = True
+                        return
+                    if url == validated_url and not any(validators.values()):
+                        with lock:
+                            validators['etag'] = response.headers.get('ETag')
+                            validators['last_modified'] = response.headers.get('Last-Modified')
+                    start, _ = parse_content_range(response.headers.get('Content-Range'))
+                    if response.status_code != 206 or start != segment.pos:
+                        raise Exception(f"{url} ignored the byte range request")
+
+                    f.seek(segment.pos)
+                    first_byte = time.monotonic()
+                    with abort_on_cancel(cancel, response):
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            if state['stop']:
+                                break
+                            with lock:
+                                # Another worker may have taken over the tail of this segment
+                                chunk = chunk[:segment.remaining]
+                                if not chunk:
+                                    break
+                            f.write(chunk)
+                            # The hasher reads finished bytes back through another handle
+                            f.flush()
+                            received += len(chunk)
+                            with lock:
+                                segment.pos += len(chunk)
+                            changed.set()
+                except Exception as e:
+                    with lock:
+                        state['errors'] += 1
+                        if len(mirrors) > 1 and url in mirrors:
+                            mirrors.remove(url)
+                        if state['errors'] >= MAX_SEGMENT_ERRORS:
+                            state['failure'] = e
+                            state['stop'] = True
+                finally:
+                    if response is not None:
+                        response.close()
+                    with lock:
+                        segment.active = False
+                    changed.set()
+                    if first_byte is not None:
+                        record_transfer_metrics(url, first_byte - started, received,
+                                                time.monotonic() - first_byte)
+
+    def stop():
+        state['stop'] = True
+        changed.set()
+
+    unregister = cancel.on_cancel(stop) if cancel is not None else None
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(segments)]
+    for thread in threads:
+        thread.start()
+
+    hashed = [0]
+    if hasher is not None:
+        hasher.reset()
+
+    def hash_prefix():
+        """Feed the hasher the bytes before the first unfinished segment"""
+        with lock:
+            done = min((s.pos for s in pending if s.remaining), default=total_size)
+        if done > hashed[0]:
+            hash_file(part_path, hasher, done - hashed[0], offset=hashed[0])
+            hashed[0] = done
+
+    last_saved = time.monotonic()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            changed.wait(0.5)
+            changed.clear()
+            if cancel is not None and cancel.is_cancelled():
+                break
+            with lock:
+                downloaded = total_size - sum(s.remaining for s in pending)
+            if hasher is not None:
+                hash_prefix()
+            yield downloaded, total_size
+
+            if time.monotonic() - last_saved >= 1.0:
+                save_ranges()
+                last_saved = time.monotonic()
+    finally:
+        # Also reached when the consumer stops iterating early
+        state['stop'] = True
+        if unregister is not None:
+            unregister()
+        for thread in threads:
+            thread.join()
+        save_ranges()
+
+    if cancel is not None and cancel.is_cancelled():
+        raise Cancelled()
+    if state['stale']:
+        remove_part_files(filepath)
+        yield from download_segmented(urls, filepath, total_size, segments, chunk_size, session,
+                                      hasher, cancel)
+        return
+    if state['failure'] is not None:
+        raise Exception(f"Download failed: {state['failure']}")
+
+    with lock:
+        remaining = sum(s.remaining for s in pending)
+    if remaining:
+        raise Exception(f"Download incomplete: {total_size - remaining} of {total_size} bytes")
+
+    if hasher is not None:
+        hash_prefix()
+
+    os.replace(part_path, filepath)
+    remove_part_files(filepath)
+    yield total_size, total_size
+
+
+def download_with_failover(urls: List[str], filepath: str, chunk_size: int = 8192, session=None,
+                           hasher=None, health=None, stall_timeout: Optional[float] = None,
+                           cancel=None) -> Generator[Tuple[int, int], None, None]:
+    """
+    Download a file over one connection, moving to the next mirror on failure
+
+    A mirror that errors, or sends nothing for `stall_timeout` seconds,
+    is abandoned and the next one resumes from the bytes already written.
+    With a health tracker each attempt's first-byte latency, throughput
+    or failure is recorded against its host.
+
+    Yields:
+        Tuple of (downloaded_bytes, total_bytes)
+    """
+    timeout = (stall_timeout, stall_timeout) if stall_timeout else None
+    last_error = None
+
+    for url in urls:
+        started = time.monotonic()
+        first_byte = None
+        first_downloaded = downloaded = 0
+        try:
+            for downloaded, total_size in download_file(url, filepath, chunk_size, session,
+                                                        hasher, timeout, urls, cancel):
+                if first_byte is None:
+                    first_byte = time.monotonic()
+                    first_downloaded = downloaded
+                yield downloaded, total_size
+        except Cancelled:
+            raise  # Not the mirror's fault
+        except Exception as e:
+            last_error = e
+            if health is not None:
+                health.record_error(url)
+            if first_byte is not None:
+                record_transfer_metrics(url, None, downloaded - first_downloaded, 0)
+            continue
+
+        if first_byte is not None:
+            record_transfer_metrics(url, first_byte - started, downloaded - first_downloaded,
+                                    time.monotonic() - first_byte)
+        if health is not None and first_byte is not None:
+            health.record_transfer(url, first_byte - started, downloaded - first_downloaded,
+                                   time.monotonic() - first_byte)
+        return
+
+    raise last_error or Exception("No download URLs")
+
+
+def download_with_mirrors(urls: List[str], filepath: str, chunk_size: int = 8192,
+                          threshold: int = 0, segments: int = 1, session=None,
+                          hasher=None, health=None, stall_timeout: Optional[float] = None,
+                          cancel=None) -> Generator[Tuple[int, int], None, None]:
+    """
+    Download a file, using segmented transfer for large files
+
+    Files of at least `threshold` bytes are split into `segments` ranges
+    and spread over every mirror that serves the same file. Smaller files
+    and servers without range support use a single connection that fails
+    over between mirrors in the given order.
+
+    Yields:
+        Tuple of (downloaded_bytes, total_bytes)
+    """
+    primary = urls[0]
+    size, accepts_ranges = 0, False
+    if segments > 1 and threshold > 0:
+        try:
+            size, accepts_ranges = probe_download(primary, session)
+        except Exception:
+            pass
+
+    filename = get_url_filename(primary)
+    if not accepts_ranges or size < threshold:
+        candidates = [primary] + [url for url in urls[1:] if get_url_filename(url) == filename]
+        yield from download_with_failover(candidates, filepath, chunk_size, session,
+                                          hasher, health, stall_timeout, cancel)
+        return
+
+    mirrors = [primary]
+    for url in urls[1:]:
+        if url in mirrors or get_url_filename(url) != filename:
+            continue
+        try:
+            if probe_download(url, session) == (size, True):
+                mirrors.append(url)
+        except Exception:
+            continue
+
+    yield from download_segmented(mirrors, filepath, size, segments, max(chunk_size, 65536), session,
+                                  hasher, cancel)
@@ -15,6 +15,13 @@ def clean_title(raw_title: str) -> str:
     return title
 
 
+def normalize_title(title: str) -> str:
+    """Normalize a cleaned title into a lookup key"""
+    title = title.replace('_', ' ')
+    title = re.sub(r'\s+', ' ', title)
+    return title.strip().casefold()
+
+
 def clean_filename(filename: str) -> str:
     """Clean filename for saving"""
     filename = urllib.parse.unquote(filename)